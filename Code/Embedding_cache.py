@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import hashlib
+import numpy as np
+
+DEFAULT_CACHE_PATH = "../Data/embedding_cache.sqlite"
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent SQLite store of float32 embeddings keyed by (paper_id, section, text hash, model name).
+    A changed section text or a different model gets a new key, so stale vectors are never reused.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Generous timeout: several CPU workers may write to the same cache
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "paper_id TEXT, section TEXT, text_hash TEXT, model TEXT, dim INTEGER, vector BLOB, "
+            "PRIMARY KEY (paper_id, section, text_hash, model))"
+        )
+        # Number of token windows pooled into a chunked section vector
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_counts ("
+            "paper_id TEXT, section TEXT, text_hash TEXT, model TEXT, chunks INTEGER, "
+            "PRIMARY KEY (paper_id, section, text_hash, model))"
+        )
+        self.conn.commit()
+
+    def get_many(self, keys):
+        """keys: iterable of (paper_id, section, text_hash, model) -> {key: np.ndarray} for cached keys"""
+        found = {}
+        for key in keys:
+            row = self.conn.execute(
+                "SELECT vector FROM embeddings WHERE paper_id = ? AND section = ? AND text_hash = ? AND model = ?", key
+            ).fetchone()
+            if row is not None:
+                found[key] = np.frombuffer(row[0], dtype=np.float32)
+        return found
+
+    def put_many(self, items):
+        """items: iterable of (key, vector)"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?, ?)",
+            [(*key, len(vec), np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in items],
+        )
+        self.conn.commit()
+
+    def get_chunk_counts(self, keys):
+        """keys: iterable of (paper_id, section, text_hash, model) -> {key: chunk count} for recorded keys"""
+        found = {}
+        for key in keys:
+            row = self.conn.execute(
+                "SELECT chunks FROM chunk_counts WHERE paper_id = ? AND section = ? AND text_hash = ? AND model = ?", key
+            ).fetchone()
+            if row is not None:
+                found[key] = row[0]
+        return found
+
+    def put_chunk_counts(self, items):
+        """items: iterable of (key, chunk count)"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO chunk_counts VALUES (?, ?, ?, ?, ?)",
+            [(*key, int(n)) for key, n in items],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,115 @@
+import os
+import csv
+import json
+import numpy as np
+
+VECTOR_FILE = "vectors.f16"
+INDEX_FILE = "index.tsv"
+META_FILE = "meta.json"
+INDEX_FIELDS = ["paper_id", "source", "review_idx", "part"]
+
+# Paper sections are stored with source "section" and review_idx -1
+SECTION_SOURCE = "section"
+
+
+class EmbeddingStore:
+    """
+    Append-only store of L2-normalized embeddings as a raw float16 matrix plus a TSV id index
+    (paper_id, source, review_idx, part), one index row per matrix row; remove rewrites both files.
+    Readers map the matrix with np.memmap, so millions of vectors load zero-copy.
+    """
+
+    def __init__(self, root, dim=1024, model_name=None):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.vector_path = os.path.join(root, VECTOR_FILE)
+        self.index_path = os.path.join(root, INDEX_FILE)
+        meta_path = os.path.join(root, META_FILE)
+
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim = meta["dim"]
+        else:
+            self.dim = dim
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": dim, "model": model_name, "dtype": "float16"}, f)
+
+        self.keys = {key: row for row, key in enumerate(read_index(self.index_path))}
+        # Drop vectors written by an interrupted append that never reached the index
+        row_bytes = self.dim * np.dtype(np.float16).itemsize
+        if os.path.exists(self.vector_path) and os.path.getsize(self.vector_path) > len(self.keys) * row_bytes:
+            with open(self.vector_path, "r+b") as f:
+                f.truncate(len(self.keys) * row_bytes)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def append(self, keys, vectors):
+        """Append vectors (n x dim, already normalized) under keys; keys already stored are skipped"""
+        vectors = np.asarray(vectors, dtype=np.float16).reshape(-1, self.dim)
+        new = [(key, vec) for key, vec in zip(keys, vectors) if key not in self.keys]
+        if not new:
+            return 0
+        with open(self.vector_path, "ab") as f:
+            f.write(np.stack([vec for _, vec in new]).tobytes())
+        with open(self.index_path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter="\t")
+            for key, _ in new:
+                self.keys[key] = len(self.keys)
+                writer.writerow(key)
+        return len(new)
+
+    def remove(self, predicate, block_rows=65536):
+        """
+        Rewrite the store without the keys for which predicate(key) is true, so they can be appended again.
+        Returns the number of removed rows.
+        """
+        keys = read_index(self.index_path)
+        keep = [row for row, key in enumerate(keys) if not predicate(key)]
+        removed = len(keys) - len(keep)
+        if not removed:
+            return 0
+        if keep:
+            vectors = np.memmap(self.vector_path, dtype=np.float16, mode="r", shape=(len(keys), self.dim))
+            with open(self.vector_path + ".tmp", "wb") as f:
+                for start in range(0, len(keep), block_rows):
+                    f.write(np.ascontiguousarray(vectors[keep[start:start + block_rows]]).tobytes())
+            del vectors
+        else:
+            open(self.vector_path + ".tmp", "wb").close()
+        with open(self.index_path + ".tmp", "w", newline="", encoding="utf-8") as f:
+            csv.writer(f, delimiter="\t").writerows(keys[row] for row in keep)
+        os.replace(self.vector_path + ".tmp", self.vector_path)
+        os.replace(self.index_path + ".tmp", self.index_path)
+        self.keys = {keys[row]: new_row for new_row, row in enumerate(keep)}
+        return removed
+
+
+def read_index(index_path):
+    """List of (paper_id, source, review_idx, part) keys in matrix row order"""
+    if not os.path.exists(index_path):
+        return []
+    with open(index_path, "r", newline="", encoding="utf-8") as f:
+        return [(paper_id, source, int(review_idx), part) for paper_id, source, review_idx, part in csv.reader(f, delimiter="\t")]
+
+
+def load_store(root):
+    """Return (keys, vectors) with vectors as a read-only float16 memmap of shape (len(keys), dim)"""
+    with open(os.path.join(root, META_FILE), "r", encoding="utf-8") as f:
+        dim = json.load(f)["dim"]
+    keys = read_index(os.path.join(root, INDEX_FILE))
+    if not keys:
+        return keys, np.zeros((0, dim), dtype=np.float16)
+    vectors = np.memmap(os.path.join(root, VECTOR_FILE), dtype=np.float16, mode="r", shape=(len(keys), dim))
+    return keys, vectors
+
+
+def cosine_scores(vectors, query_rows, target_rows):
+    """Cosine similarity matrix between two row selections of a normalized store"""
+    queries = np.asarray(vectors[query_rows], dtype=np.float32)
+    targets = np.asarray(vectors[target_rows], dtype=np.float32)
+    return queries @ targets.T
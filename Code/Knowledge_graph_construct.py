@@ -1,14 +1,32 @@
 import os
+import re
 import json
 import csv
-import networkx as nx
+import zlib
+import hashlib
+import sqlite3
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from array import array
 from collections import Counter
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, shortest_path
 import math
 import random
+import itertools
+
+# networkx is only needed to materialize graphs for richer metrics (see CompactGraph.to_networkx)
+try:
+    import networkx as nx
+except ImportError:
+    nx = None
+
+UNDIRECTED_RELATIONS = {'COMPARE', 'CONJUNCTION'}
 # ===== Helper function to build entity graph from predictions =====
 def build_entity_graph(predicted_ner, predicted_re, flat_sentences):
     G = nx.DiGraph()
-    undirected_relations = {'COMPARE', 'CONJUNCTION'}
+    undirected_relations = UNDIRECTED_RELATIONS
 
     for ent in predicted_ner:
         start, end, label = ent
@@ -29,56 +47,409 @@ def build_entity_graph(predicted_ner, predicted_re, flat_sentences):
 
     return G
 
+# ===== Compact array-backed entity graph =====
+# NER labels and relation types are interned to small integer codes shared by all graphs
+LABEL_CODES = {}
+LABEL_NAMES = []
+
+def intern_label(name):
+    code = LABEL_CODES.get(name)
+    if code is None:
+        code = LABEL_CODES[name] = len(LABEL_NAMES)
+        LABEL_NAMES.append(name)
+    return code
+
+class CompactGraph:
+    """
+    Entity graph as integer arrays, with the same node/edge semantics as build_entity_graph:
+    nodes are unique (start, end) spans in first-seen order labelled by their last NER label,
+    edges are directed (head, tail) node pairs, added in reverse too for undirected relations
+    and counted once however often they occur.
+    """
+
+    __slots__ = ('node_spans', 'node_labels', 'heads', 'tails', 'relations', 'num_edges', 'tokens')
+
+    def __init__(self, node_spans, node_labels, heads, tails, relations, num_edges, tokens=None):
+        self.node_spans = node_spans    # array('q') of start, end pairs, flattened
+        self.node_labels = node_labels  # array('H') of label codes, one per node
+        self.heads = heads              # array('i') of node indices of every added edge, in insertion order
+        self.tails = tails
+        self.relations = relations      # array('H') of relation codes
+        self.num_edges = num_edges
+        self.tokens = tokens
+
+    def number_of_nodes(self):
+        return len(self.node_labels)
+
+    def number_of_edges(self):
+        return self.num_edges
+
+    def to_networkx(self):
+        """Equivalent nx.DiGraph (with node text when tokens were kept), for metrics that need NetworkX"""
+        if nx is None:
+            raise ImportError("networkx is required to materialize graphs")
+        G = nx.DiGraph()
+        nodes = list(zip(self.node_spans[0::2], self.node_spans[1::2]))
+        for (start, end), label in zip(nodes, self.node_labels):
+            token = " ".join(self.tokens[start:end+1]) if self.tokens is not None else ""
+            G.add_node((start, end), label=LABEL_NAMES[label], text=token)
+        for h, t, rel in zip(self.heads, self.tails, self.relations):
+            G.add_edge(nodes[h], nodes[t], relation=LABEL_NAMES[rel])
+        return G
+
+def build_compact_graph(predicted_ner, predicted_re, flat_sentences=None):
+    """Array-backed counterpart of build_entity_graph"""
+    node_index = {}
+    node_spans = array('q')
+    node_labels = array('H')
+    for start, end, label in predicted_ner:
+        node = node_index.get((start, end))
+        if node is None:
+            node_index[(start, end)] = len(node_labels)
+            node_spans.extend((start, end))
+            node_labels.append(intern_label(label))
+        else:
+            node_labels[node] = intern_label(label)
+
+    heads, tails, relations = array('i'), array('i'), array('H')
+    edges = set()
+    for h_span, t_span, rel_type in predicted_re:
+        h = node_index.get((h_span[0], h_span[1]))
+        t = node_index.get((t_span[0], t_span[1]))
+        if h is None or t is None:
+            continue
+        rel = intern_label(rel_type)
+        heads.append(h)
+        tails.append(t)
+        relations.append(rel)
+        edges.add((h, t))
+        if rel_type in UNDIRECTED_RELATIONS:
+            heads.append(t)
+            tails.append(h)
+            relations.append(rel)
+            edges.add((t, h))
+
+    return CompactGraph(node_spans, node_labels, heads, tails, relations, len(edges), flat_sentences)
+
+# ===== Metric registry =====
+# Each metric declares the CSV columns it produces and the metrics it depends on; metrics without
+# columns (structure, adjacency) are shared intermediate results and are never cached or written.
+class Metric:
+    __slots__ = ('name', 'columns', 'depends', 'func')
+
+    def __init__(self, name, columns, depends, func):
+        self.name = name
+        self.columns = columns
+        self.depends = depends
+        self.func = func
+
+METRICS = {}
+# Columns of the original graph_metrics_clean.csv
+DEFAULT_METRICS = ['basic', 'label_entropy']
+
+def register_metric(name, columns=(), depends=()):
+    """Decorator registering func(G, deps) -> {column: value}, with deps the results of its dependencies"""
+    def decorator(func):
+        METRICS[name] = Metric(name, tuple(columns), tuple(depends), func)
+        return func
+    return decorator
+
+def metric_columns(names):
+    return [column for name in names for column in METRICS[name].columns]
+
+def entropy(counts):
+    total = sum(counts)
+    if total == 0:
+        return 0.0
+    return -sum((c / total) * math.log(c / total, 2) for c in counts)
+
+@register_metric('structure')
+def structure_metric(G, deps):
+    """Node count, node labels in node order and unique edges {(head, tail): relation} of either graph type"""
+    if isinstance(G, CompactGraph):
+        edges = {}
+        for h, t, rel in zip(G.heads, G.tails, G.relations):
+            edges[(h, t)] = rel
+        return {'num_nodes': G.number_of_nodes(), 'labels': list(G.node_labels), 'edges': edges}
+    index = {node: i for i, node in enumerate(G.nodes)}
+    return {
+        'num_nodes': G.number_of_nodes(),
+        'labels': [G.nodes[n]['label'] for n in G.nodes if 'label' in G.nodes[n]],
+        'edges': {(index[u], index[v]): rel for u, v, rel in G.edges(data='relation')},
+    }
+
+@register_metric('adjacency', depends=('structure',))
+def adjacency_metric(G, deps):
+    structure = deps['structure']
+    n = structure['num_nodes']
+    edges = list(structure['edges'])
+    heads = [h for h, _ in edges]
+    tails = [t for _, t in edges]
+    return {'matrix': csr_matrix((np.ones(len(edges)), (heads, tails)), shape=(n, n))}
+
+@register_metric('basic', columns=('num_nodes', 'num_edges', 'avg_degree'), depends=('structure',))
+def basic_metric(G, deps):
+    num_nodes = deps['structure']['num_nodes']
+    num_edges = len(deps['structure']['edges'])
+    # Every directed edge (self-loops included) adds one out- and one in-degree
+    return {'num_nodes': num_nodes, 'num_edges': num_edges, 'avg_degree': 2 * num_edges / max(1, num_nodes)}
+
+@register_metric('label_entropy', columns=('label_entropy',), depends=('structure',))
+def label_entropy_metric(G, deps):
+    # Counter keeps first-seen label order, so the sum is the same for both graph types
+    return {'label_entropy': entropy(list(Counter(deps['structure']['labels']).values()))}
+
+@register_metric('relation_entropy', columns=('relation_entropy',), depends=('structure',))
+def relation_entropy_metric(G, deps):
+    # Sorted counts: edge order differs between the two graph types
+    return {'relation_entropy': entropy(sorted(Counter(deps['structure']['edges'].values()).values()))}
+
+@register_metric('density', columns=('density',), depends=('basic',))
+def density_metric(G, deps):
+    n = deps['basic']['num_nodes']
+    return {'density': deps['basic']['num_edges'] / (n * (n - 1)) if n > 1 else 0.0}
+
+@register_metric('reciprocity', columns=('reciprocity',), depends=('structure',))
+def reciprocity_metric(G, deps):
+    """Share of non-loop edges whose reverse edge exists (COMPARE/CONJUNCTION add both directions)"""
+    edges = deps['structure']['edges']
+    reciprocated = sum(1 for h, t in edges if h != t and (t, h) in edges)
+    return {'reciprocity': reciprocated / len(edges) if edges else 0.0}
+
+@register_metric('components', columns=('num_components', 'largest_component_ratio'), depends=('adjacency',))
+def components_metric(G, deps):
+    matrix = deps['adjacency']['matrix']
+    n = matrix.shape[0]
+    if n == 0:
+        return {'num_components': 0, 'largest_component_ratio': 0.0}
+    num_components, labels = connected_components(matrix, directed=True, connection='weak')
+    return {'num_components': int(num_components), 'largest_component_ratio': float(np.bincount(labels).max() / n)}
+
+@register_metric('path_lengths', columns=('avg_path_length', 'diameter'), depends=('adjacency',))
+def path_lengths_metric(G, deps):
+    """Mean and longest directed shortest path over the reachable node pairs (BFS on the sparse matrix)"""
+    matrix = deps['adjacency']['matrix']
+    if matrix.shape[0] < 2 or matrix.nnz == 0:
+        return {'avg_path_length': 0.0, 'diameter': 0}
+    lengths = shortest_path(matrix, directed=True, unweighted=True)
+    np.fill_diagonal(lengths, np.inf)
+    reachable = lengths[np.isfinite(lengths)]
+    if reachable.size == 0:
+        return {'avg_path_length': 0.0, 'diameter': 0}
+    return {'avg_path_length': float(reachable.mean()), 'diameter': int(reachable.max())}
+
+def resolve_metrics(names):
+    """Check requested metric names and their dependencies"""
+    seen, stack = set(), list(names)
+    while stack:
+        name = stack.pop()
+        if name not in METRICS:
+            raise ValueError(f"Unknown metric: {name} (available: {', '.join(METRICS)})")
+        if name not in seen:
+            seen.add(name)
+            stack.extend(METRICS[name].depends)
+    return list(dict.fromkeys(names))
+
 # ===== Graph metrics =====
-def compute_graph_metrics(G):
-    metrics = {}
-    metrics['num_nodes'] = G.number_of_nodes()
-    metrics['num_edges'] = G.number_of_edges()
-    metrics['avg_degree'] = sum(dict(G.degree()).values()) / max(1, G.number_of_nodes())
+def compute_graph_metrics(G, names=DEFAULT_METRICS, cached=None, computed=None):
+    """
+    Columns of the requested metrics, in request order.
+    cached: {metric name: {column: value}} already known for this graph; those metrics (and any
+    dependencies only they need) are not computed again.
+    computed: optional dict receiving the newly computed column metrics, e.g. for a MetricCache.
+    """
+    results = dict(cached or {})
 
-    labels = [G.nodes[n]['label'] for n in G.nodes if 'label' in G.nodes[n]]
-    label_count = Counter(labels)
-    total_labels = sum(label_count.values())
-    if total_labels > 0:
-        metrics['label_entropy'] = -sum((c / total_labels) * math.log(c / total_labels, 2) for c in label_count.values())
-    else:
-        metrics['label_entropy'] = 0.0
+    def evaluate(name):
+        if name not in results:
+            metric = METRICS[name]
+            results[name] = metric.func(G, {dep: evaluate(dep) for dep in metric.depends})
+            if computed is not None and metric.columns:
+                computed[name] = {column: results[name][column] for column in metric.columns}
+        return results[name]
 
-    return metrics
+    row = {}
+    for name in names:
+        values = evaluate(name)
+        row.update((column, values[column]) for column in METRICS[name].columns)
+    return row
 
+# ===== Metric cache =====
+METRIC_CACHE_PATH = '../Data/Knowledge_Graph/metric_cache.sqlite'
+
+class MetricCache:
+    """
+    SQLite cache of metric columns per graph, keyed by cell, source, line index and metric name.
+    Each row also keeps the size/mtime of the source file it was computed from, so edited inputs
+    are recomputed; adding a metric to a run only computes that metric.
+    """
+
+    def __init__(self, path=METRIC_CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Generous timeout: several worker processes write to the same cache
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS metrics ("
+            "conference TEXT, year TEXT, category TEXT, source TEXT, line_index INTEGER, "
+            "input TEXT, metric TEXT, value TEXT, "
+            "PRIMARY KEY (conference, year, category, source, line_index, metric))"
+        )
+        self.conn.commit()
+
+    def load_cell(self, conference, year, category, inputs, names):
+        """inputs: {source: file stamp} -> {(source, line_index): {metric: columns}} for current inputs"""
+        found = {}
+        placeholders = ", ".join("?" for _ in names)
+        rows = self.conn.execute(
+            f"SELECT source, line_index, input, metric, value FROM metrics "
+            f"WHERE conference = ? AND year = ? AND category = ? AND metric IN ({placeholders})",
+            (conference, year, category, *names),
+        )
+        for source, line_index, stamp, metric, value in rows:
+            if inputs.get(source) == stamp:
+                found.setdefault((source, line_index), {})[metric] = json.loads(value)
+        return found
+
+    def put_many(self, conference, year, category, items):
+        """items: iterable of (source, line_index, file stamp, metric, columns)"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(conference, year, category, source, line_index, stamp, metric, json.dumps(columns))
+             for source, line_index, stamp, metric, columns in items],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
 
 # ===== Determine if a real review question section is empty/invalid =====
 def should_filter_question(example):
     return example['doc_key'].endswith('_questions') and len(example['sentences']) == 1 and len(example['sentences'][0]) < 10
 
-# ===== Load graphs with aligned filtering =====
-def load_graphs_multi_source(base_dir, sources, conference, year, category):
-    graphs = {}
+# ===== Streaming input =====
+DOC_KEY_PATTERN = re.compile(r'"doc_key":\s*"([^"_]*)')
+
+def iter_jsonl(path, paper_filter=None):
+    """
+    Yield (line_index, example) for each line of a JSONL file.
+    paper_filter: optional predicate on paper_id; other lines are skipped before JSON parsing.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_idx, line in enumerate(f):
+            if paper_filter is not None:
+                match = DOC_KEY_PATTERN.search(line)
+                if match and not paper_filter(match.group(1)):
+                    continue
+            example = json.loads(line)
+            if paper_filter is None or paper_filter(example['doc_key'].split('_')[0]):
+                yield line_idx, example
+
+def source_path(base_dir, source, conference, year, category):
+    return os.path.join(base_dir, source, conference, year, f"merged_ent_pred_with_rel_{category}.jsonl")
+
+def count_question_skips(real_path, paper_filter=None):
+    """Cheap first pass over the real file: number of empty/invalid question sections per paper"""
     skip_count = {}
-    source_lines = {src: [] for src in sources}
+    if not os.path.exists(real_path):
+        return skip_count
+    for _, line in iter_jsonl(real_path, paper_filter):
+        if should_filter_question(line):
+            paper_id = line['doc_key'].split('_')[0]
+            skip_count[paper_id] = skip_count.get(paper_id, 0) + 1
+    return skip_count
 
-    # Step 1: Collect real review skip counts
-    for source in sources:
-        jsonl_path = os.path.join(base_dir, source, conference, year, f"merged_ent_pred_with_rel_{category}.jsonl")
-        if not os.path.exists(jsonl_path):
-            continue
+def example_graph(example, use_networkx=False):
+    """Graph of one PL-Marker example: a CompactGraph, or an nx.DiGraph when use_networkx is set"""
+    flat_tokens = [tok for sent in example['sentences'] for tok in sent]
+    all_ner = [(s, e, l) for ner in example['predicted_ner'] for (s, e, l) in ner]
+    all_re = [(h, t, r) for (s_idx, rels) in example['predicted_re'] for (h, t, r) in rels]
+    if use_networkx:
+        return build_entity_graph(all_ner, all_re, flat_tokens)
+    return build_compact_graph(all_ner, all_re, flat_tokens)
 
-        with open(jsonl_path, 'r', encoding='utf-8') as f:
-            lines = [json.loads(line) for line in f]
+def shard_filter(shard):
+    """shard: (index, count) -> predicate keeping the papers of that shard, stable across processes"""
+    if shard is None:
+        return None
+    index, count = shard
+    return lambda paper_id: zlib.crc32(paper_id.encode('utf-8')) % count == index
 
-        if source == 'real':
-            for line in lines:
-                if should_filter_question(line):
-                    paper_id = line['doc_key'].split('_')[0]
-                    skip_count[paper_id] = skip_count.get(paper_id, 0) + 1
+def alignment_rng(seed, conference, year, category, source, paper_id):
+    """Per-paper RNG, so the aligned question subset does not depend on sharding or worker count"""
+    return random.Random(f"{seed}/{conference}/{year}/{category}/{source}/{paper_id}")
 
-        source_lines[source] = lines
+# ===== Alignment manifest =====
+# Kept LLM question lines of one cell and seed, in emission order:
+# a "#inputs<TAB>fingerprint" header, then one "source<TAB>paper_id<TAB>line_idx" row per kept line
+def manifest_path(output_base, conference, year, category, seed):
+    return os.path.join(output_base, conference, year, category, f"alignment_seed{seed}.tsv")
 
-    # Step 2: Build graphs with filtering
+def input_fingerprint(base_dir, sources, conference, year, category):
+    """Name, size and mtime of every input file; a changed input invalidates the manifest"""
+    digest = hashlib.sha1()
     for source in sources:
+        path = source_path(base_dir, source, conference, year, category)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{source}:{stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+    return digest.hexdigest()
+
+def load_alignment_manifest(path, fingerprint):
+    """{(source, line_idx): emission index}, or None when missing or built from other inputs"""
+    if not os.path.exists(path):
+        return None
+    manifest = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        header = f.readline().rstrip('\n').split('\t')
+        if header != ['#inputs', fingerprint]:
+            return None
+        for line in f:
+            source, paper_id, line_idx = line.rstrip('\n').split('\t')
+            manifest[(source, int(line_idx))] = len(manifest)
+    return manifest
+
+def save_alignment_manifest(path, fingerprint, kept):
+    """kept: (order, source, paper_id, line_idx) records of all shards; written in emission order"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(f"#inputs\t{fingerprint}\n")
+        for _, source, paper_id, line_idx in sorted(kept, key=lambda record: record[0]):
+            f.write(f"{source}\t{paper_id}\t{line_idx}\n")
+    os.replace(tmp_path, path)
+
+# ===== Load graphs with aligned filtering =====
+def iter_ordered_graphs(base_dir, sources, conference, year, category, use_networkx=False, seed=None, shard=None,
+                        manifest=None, record=None):
+    """
+    Yield (order, key, graph). order sorts the graphs of several shards back into the sequential order:
+    (source index, 0, line index) for regular sections and, for aligned LLM questions,
+    (source index, 1, first question line of the paper, position in the sample), or
+    (source index, 1, manifest index) when replaying a manifest.
+    seed: None uses the global random module as before, otherwise a per-paper RNG (see alignment_rng).
+    manifest: alignment from load_alignment_manifest; the skip counts and sampling are then skipped.
+    record: optional list that receives (order, source, paper_id, line_idx) for every kept question line.
+    """
+    paper_filter = shard_filter(shard)
+
+    # Step 1: Collect real review skip counts
+    skip_count = {}
+    if manifest is None and 'real' in sources:
+        skip_count = count_question_skips(source_path(base_dir, 'real', conference, year, category), paper_filter)
+
+    # Step 2: Stream graphs with filtering
+    for source_idx, source in enumerate(sources):
+        jsonl_path = source_path(base_dir, source, conference, year, category)
+        if not os.path.exists(jsonl_path):
+            continue
+
         paper_question_map = {}
 
-        for line_idx, example in enumerate(source_lines[source]):
+        for line_idx, example in iter_jsonl(jsonl_path, paper_filter):
             doc_key = example['doc_key']
             paper_id = doc_key.split('_')[0]
             section = doc_key.split('_')[-1]
@@ -87,69 +458,226 @@ def load_graphs_multi_source(base_dir, sources, conference, year, category):
             if source == 'real' and should_filter_question(example):
                 continue
 
+            # Question sections wait for the alignment as graphs; their parsed examples are dropped here
             if source != 'real' and section == 'questions':
-                paper_question_map.setdefault(paper_id, []).append((key, example))
+                if manifest is None:
+                    paper_question_map.setdefault(paper_id, []).append((key, example_graph(example, use_networkx)))
+                elif (source, line_idx) in manifest:
+                    paper_question_map[manifest[(source, line_idx)]] = (key, example_graph(example, use_networkx))
             else:
-                flat_tokens = [tok for sent in example['sentences'] for tok in sent]
-                all_ner = [(s, e, l) for ner in example['predicted_ner'] for (s, e, l) in ner]
-                all_re = [(h, t, r) for (s_idx, rels) in example['predicted_re'] for (h, t, r) in rels]
-                G = build_entity_graph(all_ner, all_re, flat_tokens)
-                graphs[key] = G
-
-        # Randomly skip questions in LLMs to match real
-        if source != 'real':
+                yield (source_idx, 0, line_idx), key, example_graph(example, use_networkx)
+
+        if source == 'real':
+            continue
+        if manifest is not None:
+            selected = [((source_idx, 1, index), item) for index, item in sorted(paper_question_map.items())]
+        else:
+            # Randomly skip questions in LLMs to match real
+            selected = []
             for paper_id, items in paper_question_map.items():
                 to_skip = skip_count.get(paper_id, 0)
-                selected = random.sample(items, k=max(0, len(items)-to_skip)) if to_skip < len(items) else []
-                for key, example in selected:
-                    flat_tokens = [tok for sent in example['sentences'] for tok in sent]
-                    all_ner = [(s, e, l) for ner in example['predicted_ner'] for (s, e, l) in ner]
-                    all_re = [(h, t, r) for (s_idx, rels) in example['predicted_re'] for (h, t, r) in rels]
-                    G = build_entity_graph(all_ner, all_re, flat_tokens)
-                    graphs[key] = G
+                rng = random if seed is None else alignment_rng(seed, conference, year, category, source, paper_id)
+                sample = rng.sample(items, k=max(0, len(items)-to_skip)) if to_skip < len(items) else []
+                first_line = items[0][0][3]
+                selected.extend(((source_idx, 1, first_line, position), item) for position, item in enumerate(sample))
+        for order, (key, G) in selected:
+            if record is not None:
+                record.append((order, source, key[0], key[3]))
+            yield order, key, G
+
+def iter_graphs_multi_source(base_dir, sources, conference, year, category, use_networkx=False, seed=None, shard=None):
+    """
+    Yield (key, graph) one at a time, in the same order as load_graphs_multi_source.
+    Only the graphs of the LLM question sections of the current source are buffered until alignment.
+    Graphs are CompactGraphs unless use_networkx is set.
+    """
+    for _, key, G in iter_ordered_graphs(base_dir, sources, conference, year, category, use_networkx, seed, shard):
+        yield key, G
+
+def load_graphs_multi_source(base_dir, sources, conference, year, category, use_networkx=False, seed=None):
+    return dict(iter_graphs_multi_source(base_dir, sources, conference, year, category, use_networkx, seed))
 
-    return graphs
+def iter_aligned_graphs(base_dir, output_base, sources, conference, year, category, seed=0, use_networkx=False):
+    """
+    iter_graphs_multi_source with the alignment of (conference, year, category, seed) read from its manifest,
+    or computed and saved as the manifest once the cell has been read completely.
+    """
+    path = manifest_path(output_base, conference, year, category, seed)
+    fingerprint = input_fingerprint(base_dir, sources, conference, year, category)
+    manifest = load_alignment_manifest(path, fingerprint)
+    record = [] if manifest is None else None
+    count = 0
+    for _, key, G in iter_ordered_graphs(base_dir, sources, conference, year, category, use_networkx, seed,
+                                         manifest=manifest, record=record):
+        count += 1
+        yield key, G
+    if record is not None and count:
+        save_alignment_manifest(path, fingerprint, record)
 
 # ===== Save metrics to CSV =====
-def save_metrics_to_csv(graphs, output_path):
-    if not graphs:
+def metric_row(key, G, names=DEFAULT_METRICS, cached=None, computed=None):
+    paper_id, section, source_type, line_index = key
+    row = {'paper_id': paper_id, 'section': section, 'source_type': source_type, 'line_index': line_index}
+    row.update(compute_graph_metrics(G, names, cached, computed))
+    return row
+
+def iter_metric_rows(ordered_graphs, base_dir, sources, conference, year, category, names=DEFAULT_METRICS, cache=None,
+                     flush_every=1000):
+    """
+    Yield (order, row) for (order, key, graph) items of one cell, read from the given sources.
+    With a MetricCache, cached metrics are reused and newly computed ones are stored in batches.
+    """
+    if cache is None:
+        for order, key, G in ordered_graphs:
+            yield order, metric_row(key, G, names)
         return
 
-    sample_metrics = compute_graph_metrics(next(iter(graphs.values())))
-    fieldnames = ['paper_id', 'section', 'source_type', 'line_index'] + list(sample_metrics.keys())
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    inputs = {}
+    for source in sources:
+        path = source_path(base_dir, source, conference, year, category)
+        if os.path.exists(path):
+            inputs[source] = file_stamp(path)
+    stored = cache.load_cell(conference, year, category, inputs, [n for n in METRICS if METRICS[n].columns])
+    pending = []
+    for order, key, G in ordered_graphs:
+        computed = {}
+        yield order, metric_row(key, G, names, stored.get((key[2], key[3])), computed)
+        pending.extend((key[2], key[3], inputs[key[2]], metric, columns) for metric, columns in computed.items())
+        if len(pending) >= flush_every:
+            cache.put_many(conference, year, category, pending)
+            pending = []
+    if pending:
+        cache.put_many(conference, year, category, pending)
 
+def write_metric_rows(rows, output_path):
+    """Write metric row dicts to CSV as they arrive; nothing is written when there are no rows"""
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    count = 0
     with open(output_path, 'w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=list(first.keys()))
         writer.writeheader()
-
-        for key, G in graphs.items():
-            paper_id, section, source_type, line_index = key
-            metrics = compute_graph_metrics(G)
-            row = {'paper_id': paper_id, 'section': section, 'source_type': source_type, 'line_index': line_index}
-            row.update(metrics)
+        for row in itertools.chain([first], rows):
             writer.writerow(row)
+            count += 1
+    return count
+
+def save_metrics_to_csv(graphs, output_path, names=DEFAULT_METRICS):
+    """graphs: dict or iterable of (key, graph); rows are written as graphs arrive"""
+    items = graphs.items() if isinstance(graphs, dict) else graphs
+    return write_metric_rows((metric_row(key, G, names) for key, G in items), output_path)
+
+# ===== Parallel driver =====
+BASE_DIR = '../Data/Knowledge_Graph/'
+OUTPUT_BASE = '../Data/Knowledge_Graph/'
+conferences_years = {
+    "ICLR": ["2024", "2025"],
+    "NeurIPS": ["2023", "2024"]
+}
+categories = ["good", "borderline", "bad"]
+sources = ["claude", "gemini", "gpt", "llama", "qwen", "real"]
+# Cells with more input than this are split into paper shards
+SHARD_BYTES = 64 * 1024 * 1024
+
+def cell_output_path(conf, year, category):
+    return os.path.join(OUTPUT_BASE, conf, year, category, "graph_metrics_clean.csv")
+
+def cell_input_bytes(conf, year, category):
+    paths = [source_path(BASE_DIR, source, conf, year, category) for source in sources]
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+def process_cell_shard(conf, year, category, seed, shard, manifest=None, names=DEFAULT_METRICS, use_cache=True):
+    """Metric rows of one shard of a cell as (order, row) pairs, plus the kept question records when aligning"""
+    record = [] if manifest is None else None
+    cache = MetricCache() if use_cache else None
+    graphs = iter_ordered_graphs(BASE_DIR, sources, conf, year, category, seed=seed, shard=shard,
+                                 manifest=manifest, record=record)
+    rows = list(iter_metric_rows(graphs, BASE_DIR, sources, conf, year, category, names, cache))
+    if cache is not None:
+        cache.close()
+    return rows, record
+
+def plan_cells(max_shards):
+    """(conf, year, category, n_shards) for every cell with input files"""
+    cells = []
+    for conf, years in conferences_years.items():
+        for year in years:
+            for category in categories:
+                size = cell_input_bytes(conf, year, category)
+                if size == 0:
+                    continue
+                cells.append((conf, year, category, max(1, min(max_shards, math.ceil(size / SHARD_BYTES)))))
+    return cells
+
+def run_parallel(workers, seed=0, max_shards=None, names=DEFAULT_METRICS, use_cache=True):
+    """Dispatch cells, and paper shards of large cells, to a process pool; each CSV is written once its shards finish"""
+    cells = plan_cells(max_shards or workers)
+    pending = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        fingerprints = {}
+        for conf, year, category, n_shards in cells:
+            pending[(conf, year, category)] = [None] * n_shards
+            fingerprints[(conf, year, category)] = fingerprint = input_fingerprint(BASE_DIR, sources, conf, year, category)
+            manifest = load_alignment_manifest(manifest_path(OUTPUT_BASE, conf, year, category, seed), fingerprint)
+            for index in range(n_shards):
+                shard = (index, n_shards) if n_shards > 1 else None
+                futures[pool.submit(process_cell_shard, conf, year, category, seed, shard, manifest, names, use_cache)] = (conf, year, category, index)
+
+        for future in as_completed(futures):
+            conf, year, category, index = futures[future]
+            parts = pending[(conf, year, category)]
+            parts[index] = future.result()
+            if all(part is not None for part in parts):
+                rows = sorted((item for part, _ in parts for item in part), key=lambda item: item[0])
+                count = write_metric_rows((row for _, row in rows), cell_output_path(conf, year, category))
+                if parts[0][1] is not None:
+                    kept = [item for _, record in parts for item in record]
+                    save_alignment_manifest(manifest_path(OUTPUT_BASE, conf, year, category, seed),
+                                            fingerprints[(conf, year, category)], kept)
+                print(f"\U0001F680 {conf} {year} {category}: {count} graphs ({len(parts)} shards)")
+                del pending[(conf, year, category)]
 
 # ===== Main Execution =====
-def main():
-    base_dir = '../Data/Knowledge_Graph/'
-    output_base = '../Data/Knowledge_Graph/'
-    conferences_years = {
-        "ICLR": ["2024", "2025"],
-        "NeurIPS": ["2023", "2024"]
-    }
-    categories = ["good", "borderline", "bad"]
-    sources = ["claude", "gemini", "gpt", "llama", "qwen", "real"]
+def main(workers=1, seed=0, max_shards=None, names=DEFAULT_METRICS, use_cache=True):
+    """
+    names: registered metrics to write (DEFAULT_METRICS gives the original columns).
+    use_cache: reuse per-graph metric values from METRIC_CACHE_PATH and store new ones there.
+    workers > 1 processes cells (and paper shards of large cells) in parallel.
+    seed: question alignment seed; results are identical for any worker or shard count.
+    The alignment of each cell is saved as alignment_seed<seed>.tsv next to its CSV and reused by later runs.
+    """
+    names = resolve_metrics(names)
+    if workers > 1:
+        run_parallel(workers, seed, max_shards, names, use_cache)
+        print("\n All graph metrics extraction completed!")
+        return
+
+    cache = MetricCache() if use_cache else None
 
     for conf, years in conferences_years.items():
         for year in years:
             for category in categories:
                 print(f"\U0001F680 Processing {conf} {year} {category}...")
-                graphs = load_graphs_multi_source(base_dir, sources, conf, year, category)
-                output_csv = os.path.join(output_base, conf, year, category, "graph_metrics_clean.csv")
-                save_metrics_to_csv(graphs, output_csv)
+                graphs = ((None, key, G) for key, G in iter_aligned_graphs(BASE_DIR, OUTPUT_BASE, sources, conf, year, category, seed))
+                rows = iter_metric_rows(graphs, BASE_DIR, sources, conf, year, category, names, cache)
+                write_metric_rows((row for _, row in rows), cell_output_path(conf, year, category))
 
+    if cache is not None:
+        cache.close()
     print("\n All graph metrics extraction completed!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Knowledge graph metrics per review section")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="question alignment seed")
+    parser.add_argument("--max-shards", type=int, default=None, help="max paper shards per large cell (default: workers)")
+    parser.add_argument("--metrics", nargs="+", default=DEFAULT_METRICS,
+                        help=f"metrics to write, from: {', '.join(n for n in METRICS if METRICS[n].columns)}")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the per-graph metric cache")
+    args = parser.parse_args()
+    main(args.workers, args.seed, args.max_shards, args.metrics, not args.no_cache)
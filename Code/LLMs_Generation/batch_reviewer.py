@@ -0,0 +1,290 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+from collections import defaultdict
+from review_engine import collect_pending_papers
+from reviewer import extract_text_from_mmd, make_adapter, OPENAI_API_KEY, CLAUDE_API_KEY
+
+VENUES = [("ICLR", "2024"), ("ICLR", "2025"), ("NeurIPS", "2023"), ("NeurIPS", "2024")]
+LABELS = ["good", "borderline", "bad"]
+BATCH_ROOT = "../Data/batches"
+POLL_INTERVAL = 60
+
+
+# ===== Batch backends =====
+# format_line(custom_id, body) -> one JSONL input record, submit(input_path) -> batch_id,
+# status(batch_id) -> "in_progress" | "completed" | "failed",
+# results(batch_id) -> iterator of (custom_id, text or None).
+# max_requests / max_bytes bound one input file; larger runs are split into several batches.
+
+class OpenAIBatchBackend:
+    """OpenAI Batch API over /v1/chat/completions"""
+    # Documented limits: 50,000 requests and 200 MB per input file
+    max_requests = 50000
+    max_bytes = 190 * 1024 * 1024
+
+    def __init__(self, api_key=OPENAI_API_KEY):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key)
+
+    def format_line(self, custom_id, body):
+        return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    def submit(self, path):
+        with open(path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h")
+        return batch.id
+
+    def status(self, batch_id):
+        status = self.client.batches.retrieve(batch_id).status
+        if status == "completed":
+            return "completed"
+        if status in ("failed", "expired", "cancelled"):
+            return "failed"
+        return "in_progress"
+
+    def results(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                yield record["custom_id"], None
+                continue
+            for choice in response["body"]["choices"]:
+                yield record["custom_id"], choice["message"]["content"]
+
+
+class AnthropicBatchBackend:
+    """Anthropic Message Batches API"""
+    # Documented limits: 100,000 requests and 256 MB per batch
+    max_requests = 100000
+    max_bytes = 240 * 1024 * 1024
+
+    def __init__(self, api_key=CLAUDE_API_KEY):
+        from anthropic import Anthropic
+        self.client = Anthropic(api_key=api_key)
+
+    def format_line(self, custom_id, body):
+        return {"custom_id": custom_id, "params": body}
+
+    def submit(self, path):
+        # The SDK takes the requests as a list; one chunk is bounded by max_bytes
+        with open(path, "r", encoding="utf-8") as f:
+            batch = self.client.messages.batches.create(requests=[json.loads(line) for line in f])
+        return batch.id
+
+    def status(self, batch_id):
+        batch = self.client.messages.batches.retrieve(batch_id)
+        return "completed" if batch.processing_status == "ended" else "in_progress"
+
+    def results(self, batch_id):
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                yield entry.custom_id, entry.result.message.content[0].text
+            else:
+                yield entry.custom_id, None
+
+
+class LocalBatchBackend:
+    """
+    File-based stand-in for a batch endpoint.
+    responder(body) -> response text is run over the input file on the first status() call,
+    so batch runs can be exercised offline and in tests.
+    """
+    max_requests = 50000
+    max_bytes = 190 * 1024 * 1024
+
+    def __init__(self, responder, work_dir=BATCH_ROOT, max_requests=None, max_bytes=None):
+        self.responder = responder
+        self.work_dir = work_dir
+        self.max_requests = max_requests or self.max_requests
+        self.max_bytes = max_bytes or self.max_bytes
+
+    def batch_dir(self, batch_id):
+        return os.path.join(self.work_dir, batch_id)
+
+    def format_line(self, custom_id, body):
+        return {"custom_id": custom_id, "body": body}
+
+    def submit(self, path):
+        batch_id = f"local_{uuid.uuid4().hex[:8]}"
+        os.makedirs(self.batch_dir(batch_id), exist_ok=True)
+        shutil.copyfile(path, os.path.join(self.batch_dir(batch_id), "input.jsonl"))
+        return batch_id
+
+    def status(self, batch_id):
+        output_path = os.path.join(self.batch_dir(batch_id), "output.jsonl")
+        if not os.path.exists(output_path):
+            with open(os.path.join(self.batch_dir(batch_id), "input.jsonl"), "r", encoding="utf-8") as f_in, \
+                    open(output_path, "w", encoding="utf-8") as f_out:
+                for line in f_in:
+                    record = json.loads(line)
+                    try:
+                        text = self.responder(record["body"])
+                    except Exception as e:
+                        print(f"Local batch request {record['custom_id']} failed: {e}")
+                        text = None
+                    f_out.write(json.dumps({"custom_id": record["custom_id"], "text": text}, ensure_ascii=False) + "\n")
+        return "completed"
+
+    def results(self, batch_id):
+        with open(os.path.join(self.batch_dir(batch_id), "output.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                yield record["custom_id"], record["text"]
+
+
+# ===== Build, submit, poll, demultiplex =====
+def write_chunks(adapter, backend, chunk_dir, venues=VENUES, root_dir="../Data"):
+    """
+    Stream one request per pending (paper_id, sample_index) into JSONL chunk files under chunk_dir,
+    each within the backend's request and byte limits. All samples of a paper go to the same chunk.
+    Returns [{"input_path", "manifest"}] with the manifest mapping custom ids back to papers.
+    """
+    os.makedirs(chunk_dir, exist_ok=True)
+    chunks = []
+    f, count, size, manifest = None, 0, 0, {}
+    next_id = 0
+
+    for conf, year in venues:
+        for label in LABELS:
+            for paper in collect_pending_papers(conf, year, f"{adapter.name}_review", label, root_dir):
+                paper_text = extract_text_from_mmd(paper["mmd_path"])
+                body = adapter.batch_body(conf, paper_text)
+                lines = []
+                for sample_index in range(paper["num_reviews"]):
+                    # Anthropic custom ids are limited to [a-zA-Z0-9_-]{1,64}
+                    custom_id = f"req-{next_id}"
+                    next_id += 1
+                    line = json.dumps(backend.format_line(custom_id, body), ensure_ascii=False) + "\n"
+                    lines.append((custom_id, sample_index, line.encode("utf-8")))
+                paper_bytes = sum(len(line) for _, _, line in lines)
+
+                if f is not None and (count + len(lines) > backend.max_requests or size + paper_bytes > backend.max_bytes):
+                    f.close()
+                    chunks[-1]["manifest"] = manifest
+                    f = None
+                if f is None:
+                    path = os.path.join(chunk_dir, f"{adapter.name}_chunk_{len(chunks):04d}.jsonl")
+                    f = open(path, "wb")
+                    chunks.append({"input_path": path})
+                    count, size, manifest = 0, 0, {}
+
+                for custom_id, sample_index, line in lines:
+                    f.write(line)
+                    manifest[custom_id] = {**paper, "conf": conf, "year": year, "label": label, "sample_index": sample_index}
+                count += len(lines)
+                size += paper_bytes
+
+    if f is not None:
+        f.close()
+        chunks[-1]["manifest"] = manifest
+    return chunks
+
+
+def wait_for_batch(backend, batch_id, poll_interval=POLL_INTERVAL):
+    while True:
+        status = backend.status(batch_id)
+        if status != "in_progress":
+            return status
+        print(f"Batch {batch_id} in progress, polling again in {poll_interval}s")
+        time.sleep(poll_interval)
+
+
+def demultiplex(adapter, backend, batch_id, manifest):
+    """Write <model>_review/<label>_papers/<paper_id>.json for every paper with all samples valid"""
+    samples = defaultdict(list)
+    for custom_id, text in backend.results(batch_id):
+        if custom_id not in manifest or text is None:
+            continue
+        review = adapter.parse_sample(text.strip())
+        if review:
+            samples[manifest[custom_id]["output_path"]].append(review)
+
+    papers = {entry["output_path"]: entry for entry in manifest.values()}
+    saved = 0
+    for output_path, paper in papers.items():
+        reviews = samples.get(output_path, [])
+        if len(reviews) >= paper["num_reviews"]:
+            result = {
+                "paper_id": paper["paper_id"],
+                "title": paper["title"],
+                "reviews": reviews[:paper["num_reviews"]]
+            }
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+            saved += 1
+        else:
+            print(f"Incomplete result: {paper['paper_id']} (success {len(reviews)}/{paper['num_reviews']})")
+    print(f"{adapter.name} batch {batch_id}: saved {saved}/{len(papers)} papers")
+    return saved
+
+
+def save_state(state_path, state):
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, state_path)
+
+
+def run_batch(adapter, backend, venues=VENUES, root_dir="../Data", state_dir=BATCH_ROOT, poll_interval=POLL_INTERVAL):
+    """
+    Submit all pending requests for one provider as one or more batches and write the results.
+    Requests are streamed to chunk files within the provider's batch limits. Each chunk's batch id,
+    manifest and progress are saved under state_dir, so an interrupted run resumes where it stopped
+    instead of submitting again.
+    """
+    os.makedirs(state_dir, exist_ok=True)
+    state_path = os.path.join(state_dir, f"{adapter.name}_batch_state.json")
+
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        print(f"Resuming {adapter.name} batch run ({len(state['chunks'])} chunks)")
+    else:
+        chunks = write_chunks(adapter, backend, os.path.join(state_dir, f"{adapter.name}_chunks"), venues, root_dir)
+        if not chunks:
+            print(f"No pending {adapter.name} reviews")
+            return 0
+        state = {"chunks": [{**chunk, "batch_id": None, "done": False} for chunk in chunks]}
+        save_state(state_path, state)
+
+    # Submit every chunk first so the provider works on them in parallel
+    for index, chunk in enumerate(state["chunks"]):
+        if chunk["batch_id"] is None:
+            print(f"Submitting {adapter.name} chunk {index + 1}/{len(state['chunks'])} ({len(chunk['manifest'])} requests)")
+            chunk["batch_id"] = backend.submit(chunk["input_path"])
+            save_state(state_path, state)
+
+    saved = 0
+    for chunk in state["chunks"]:
+        if chunk["done"]:
+            continue
+        status = wait_for_batch(backend, chunk["batch_id"], poll_interval)
+        if status != "completed":
+            print(f"Batch {chunk['batch_id']} ended with status {status}")
+        saved += demultiplex(adapter, backend, chunk["batch_id"], chunk["manifest"])
+        chunk["done"] = True
+        save_state(state_path, state)
+
+    for chunk in state["chunks"]:
+        if os.path.exists(chunk["input_path"]):
+            os.remove(chunk["input_path"])
+    os.remove(state_path)
+    return saved
+
+
+# Usage: python batch_reviewer.py gpt|claude
+if __name__ == "__main__":
+    provider = sys.argv[1] if len(sys.argv) > 1 else "gpt"
+    backends = {"gpt": OpenAIBatchBackend, "claude": AnthropicBatchBackend}
+    run_batch(make_adapter(provider), backends[provider]())
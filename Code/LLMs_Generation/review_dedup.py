@@ -0,0 +1,224 @@
+import os
+import re
+import sys
+import glob
+import json
+import zlib
+import shutil
+from collections import defaultdict
+import numpy as np
+from tqdm import tqdm
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Embedding_store import EmbeddingStore, META_FILE
+
+VENUES = [("ICLR", "2024"), ("ICLR", "2025"), ("NeurIPS", "2023"), ("NeurIPS", "2024")]
+LABELS = ["good", "borderline", "bad"]
+MODELS = ["gpt", "gemini", "claude", "llama", "qwen"]
+REPORT_PATH = "../Data/duplicate_reviews.json"
+
+# MinHash / LSH parameters: 16 bands x 8 rows put the LSH threshold near Jaccard 0.7,
+# candidate pairs are then kept if their estimated Jaccard reaches DUPLICATE_THRESHOLD
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.8
+MERSENNE_PRIME = (1 << 31) - 1
+
+_rng = np.random.default_rng(1)
+PERM_A = _rng.integers(1, MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.integers(0, MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+
+
+def review_text(review):
+    """All textual fields of a generated review, in key order"""
+    parts = []
+    for key in sorted(review):
+        value = review[key]
+        if isinstance(value, list):
+            parts.extend(str(v) for v in value)
+        elif isinstance(value, str):
+            parts.append(value)
+    return " ".join(parts)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """32-bit hashes of the word size-grams of text"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        words = words + [""] * (size - len(words))
+    return np.fromiter(
+        {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)},
+        dtype=np.uint64,
+    )
+
+
+def minhash(text):
+    """NUM_PERM-value MinHash signature using universal hashes (a*x + b) mod p"""
+    hashes = shingles(text)
+    return ((np.outer(hashes, PERM_A) + PERM_B) % MERSENNE_PRIME).min(axis=0)
+
+
+def estimated_jaccard(sig_a, sig_b):
+    return float(np.mean(sig_a == sig_b))
+
+
+def iter_reviews(venues=VENUES, models=MODELS, root_dir="../Data"):
+    """Yield (key, review) with key (conf, year, model, label, paper_id, sample_index)"""
+    for conf, year in venues:
+        for model in models:
+            for label in LABELS:
+                folder = os.path.join(root_dir, conf, year, f"{model}_review", f"{label}_papers")
+                if not os.path.isdir(folder):
+                    continue
+                for file in sorted(os.listdir(folder)):
+                    if not file.endswith(".json"):
+                        continue
+                    with open(os.path.join(folder, file), "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    for sample_index, review in enumerate(data.get("reviews", [])):
+                        yield (conf, year, model, label, file[:-len(".json")], sample_index), review
+
+
+def find_duplicates(items, threshold=DUPLICATE_THRESHOLD):
+    """
+    items: iterable of (key, review). Signatures are banded into LSH buckets, so the work is linear in the
+    number of reviews; only reviews sharing a bucket are compared. Returns the list of duplicate pairs
+    (key_a, key_b, estimated Jaccard).
+    """
+    keys, signatures = [], []
+    buckets = defaultdict(list)
+    for key, review in tqdm(items, desc="MinHash", ncols=100):
+        signature = minhash(review_text(review))
+        row = len(keys)
+        keys.append(key)
+        signatures.append(signature)
+        for band in range(BANDS):
+            buckets[(band, signature[band * ROWS:(band + 1) * ROWS].tobytes())].append(row)
+
+    seen, pairs = set(), []
+    for rows in buckets.values():
+        for i in range(len(rows)):
+            for j in range(i + 1, len(rows)):
+                pair = (rows[i], rows[j])
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                score = estimated_jaccard(signatures[pair[0]], signatures[pair[1]])
+                if score >= threshold:
+                    pairs.append((keys[pair[0]], keys[pair[1]], score))
+    return pairs
+
+
+def cluster_pairs(pairs):
+    """Union-find over duplicate pairs -> list of clusters (sorted key lists)"""
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b, _ in pairs:
+        parent[find(a)] = find(b)
+    clusters = defaultdict(list)
+    for x in parent:
+        clusters[find(x)].append(x)
+    return [sorted(members) for members in clusters.values()]
+
+
+def split_pairs(pairs):
+    """Separate pairs of samples of the same (conf, year, model, label, paper_id) from pairs across papers"""
+    within, across = [], []
+    for pair in pairs:
+        (within if pair[0][:5] == pair[1][:5] else across).append(pair)
+    return within, across
+
+
+def build_report(pairs):
+    """
+    Duplicate clusters per (conf, year, model, label, paper_id), plus the clusters spanning several papers.
+    Per-paper clusters are built from within-paper pairs only, so a sample that also resembles another
+    paper's review still counts as a duplicate of its own paper's samples.
+    """
+    within, across = split_pairs(pairs)
+    per_paper = defaultdict(list)
+    for members in cluster_pairs(within):
+        per_paper[members[0][:5]].append([key[5] for key in members])
+    return {
+        "papers": [
+            {"conf": conf, "year": year, "model": model, "label": label, "paper_id": paper_id, "clusters": clusters}
+            for (conf, year, model, label, paper_id), clusters in sorted(per_paper.items())
+        ],
+        "cross_paper_clusters": [[list(key) for key in members] for members in cluster_pairs(across)],
+    }
+
+
+def invalidate_similarity(entry, root_dir="../Data"):
+    """
+    Delete the similarity results of a regenerated review file from every results directory of the venue
+    and drop its review-part vectors from every embedding store, so Semantic_similarity.py scores the new reviews.
+    Returns the number of removed store rows.
+    """
+    venue_dir = os.path.join(root_dir, entry["conf"], entry["year"])
+    model, label, paper_id = entry["model"], entry["label"], entry["paper_id"]
+    for result in glob.glob(os.path.join(venue_dir, "similarity_results*", f"{model}_review", label, f"{paper_id}.json")):
+        os.remove(result)
+    removed = 0
+    for store_dir in sorted(glob.glob(os.path.join(venue_dir, "embedding_store*", label))):
+        if os.path.exists(os.path.join(store_dir, META_FILE)):
+            removed += EmbeddingStore(store_dir).remove(lambda key: key[0] == paper_id and key[1] == model)
+    return removed
+
+
+def move_for_regeneration(report, root_dir="../Data"):
+    """
+    Move the review files of papers with duplicate samples to <model>_review_duplicates/,
+    so the next reviewer.py run treats them as pending and generates them again.
+    Their similarity results and stored vectors are invalidated as well.
+    Returns (moved files, removed store rows).
+    """
+    moved, removed = 0, 0
+    for entry in report["papers"]:
+        src = os.path.join(root_dir, entry["conf"], entry["year"], f"{entry['model']}_review",
+                           f"{entry['label']}_papers", f"{entry['paper_id']}.json")
+        if not os.path.exists(src):
+            continue
+        dst_dir = os.path.join(root_dir, entry["conf"], entry["year"], f"{entry['model']}_review_duplicates",
+                               f"{entry['label']}_papers")
+        os.makedirs(dst_dir, exist_ok=True)
+        shutil.move(src, os.path.join(dst_dir, f"{entry['paper_id']}.json"))
+        removed += invalidate_similarity(entry, root_dir)
+        moved += 1
+    return moved, removed
+
+
+def detect(models=MODELS, venues=VENUES, root_dir="../Data", regenerate=False, report_path=REPORT_PATH):
+    pairs = find_duplicates(iter_reviews(venues, models, root_dir))
+    report = build_report(pairs)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"{len(pairs)} near-duplicate pairs (estimated Jaccard >= {DUPLICATE_THRESHOLD})")
+    print(f"{len(report['papers'])} papers with duplicate samples, "
+          f"{len(report['cross_paper_clusters'])} clusters spanning several papers")
+    for entry in report["papers"][:20]:
+        print(f"  {entry['conf']} {entry['year']} {entry['model']} {entry['label']} {entry['paper_id']}: samples {entry['clusters']}")
+    print(f"Report saved to {report_path}")
+
+    if regenerate:
+        moved, removed = move_for_regeneration(report, root_dir)
+        print(f"Moved {moved} review files aside and dropped {removed} stored vectors, "
+              f"run reviewer.py and then Semantic_similarity.py to regenerate them")
+    return report
+
+
+# Usage: python review_dedup.py [--regenerate] [gpt claude ...]
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    regenerate = "--regenerate" in args
+    selected = [a for a in args if a != "--regenerate"] or MODELS
+    detect(selected, regenerate=regenerate)
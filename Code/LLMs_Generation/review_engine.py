@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import random
+import asyncio
+from collections import deque
+
+# Rough prompt size estimate used for the tokens-per-minute budget (~4 characters per token)
+CHARS_PER_TOKEN = 4
+EXPECTED_OUTPUT_TOKENS = 2000
+
+
+def estimate_tokens(*texts):
+    return sum(len(t) for t in texts) // CHARS_PER_TOKEN + EXPECTED_OUTPUT_TOKENS
+
+
+def backoff_delay(attempt, base=2.0, cap=60.0):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AsyncRateLimiter:
+    """Sliding one-minute window enforcing requests-per-minute and tokens-per-minute budgets"""
+
+    def __init__(self, rpm=None, tpm=None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.events = deque()  # (timestamp, tokens)
+        self.tokens_in_window = 0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, tokens=0):
+        while True:
+            async with self.lock:
+                now = time.monotonic()
+                while self.events and now - self.events[0][0] >= 60:
+                    self.tokens_in_window -= self.events.popleft()[1]
+
+                rpm_ok = self.rpm is None or len(self.events) < self.rpm
+                # A single request larger than the whole budget is let through on an empty window
+                tpm_ok = self.tpm is None or not self.events or self.tokens_in_window + tokens <= self.tpm
+                if rpm_ok and tpm_ok:
+                    self.events.append((now, tokens))
+                    self.tokens_in_window += tokens
+                    return
+                wait = 60 - (now - self.events[0][0])
+            await asyncio.sleep(max(wait, 0.05))
+
+
+class AsyncReviewEngine:
+    """
+    Runs review generation for one provider with at most `concurrency` requests in flight,
+    within the provider's rpm/tpm budget, retrying failures with jittered exponential backoff.
+
+    generate: async callable (conf, paper_text) -> review dict, raising on API or parse errors
+    on_paper_done: optional async callable (conf, paper_text), e.g. to release a per-paper prompt cache
+    warm_first: generate one sample before the others so they reuse the provider's prompt cache
+    generate_n: optional async callable (conf, paper_text, n) -> list of n reviews (None for samples
+                that failed validation), used to request the missing samples of a paper in few calls
+    max_samples: most samples one generate_n call may request (None = no limit); larger n are split
+    """
+
+    def __init__(self, generate, concurrency=8, rpm=None, tpm=None, max_retries=3, on_paper_done=None,
+                 warm_first=False, generate_n=None, max_samples=None):
+        self.generate = generate
+        self.generate_n = generate_n
+        self.max_samples = max_samples
+        self.on_paper_done = on_paper_done
+        self.warm_first = warm_first
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.limiter = AsyncRateLimiter(rpm, tpm)
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate_review(self, conf, paper_text):
+        tokens = estimate_tokens(paper_text)
+        for attempt in range(self.max_retries):
+            await self.limiter.acquire(tokens)
+            async with self.semaphore:
+                try:
+                    review = await self.generate(conf, paper_text)
+                    if review:
+                        return review
+                    raise ValueError("Empty review")
+                except Exception as e:
+                    print(f"Attempt {attempt + 1} failed: {e}")
+            await asyncio.sleep(backoff_delay(attempt))
+        return None
+
+    async def generate_reviews(self, conf, paper_text, n):
+        """
+        Request n samples in a single call; returns a list with None for failed samples.
+        If every multi-sample attempt fails, the samples are requested one by one instead.
+        """
+        tokens = estimate_tokens(paper_text) + (n - 1) * EXPECTED_OUTPUT_TOKENS
+        for attempt in range(self.max_retries):
+            await self.limiter.acquire(tokens)
+            async with self.semaphore:
+                try:
+                    return await self.generate_n(conf, paper_text, n)
+                except Exception as e:
+                    print(f"Attempt {attempt + 1} failed: {e}")
+            await asyncio.sleep(backoff_delay(attempt))
+        print(f"Multi-sample request failed, falling back to {n} single-sample requests")
+        return await asyncio.gather(*[self.generate_review(conf, paper_text) for _ in range(n)])
+
+    def sample_batches(self, n):
+        """Split n samples into generate_n calls of at most max_samples each"""
+        size = self.max_samples or n
+        return [min(size, n - start) for start in range(0, n, size)]
+
+    async def review_paper(self, conf, paper, paper_text):
+        """Generate num_reviews reviews for one paper and save them as soon as they are complete"""
+        num_reviews = paper["num_reviews"]
+        reviews = []
+        max_total_attempts = num_reviews * 3
+        attempts = 0
+
+        try:
+            while len(reviews) < num_reviews and attempts < max_total_attempts:
+                missing = num_reviews - len(reviews)
+                if self.generate_n is not None and missing > 1:
+                    # Only the samples that failed validation are requested again next round
+                    batches = await asyncio.gather(*[self.generate_reviews(conf, paper_text, size)
+                                                     for size in self.sample_batches(missing)])
+                    results = [review for batch in batches for review in batch]
+                else:
+                    if self.warm_first and not reviews and missing > 1:
+                        missing = 1
+                    results = await asyncio.gather(*[self.generate_review(conf, paper_text) for _ in range(missing)])
+                attempts += missing
+                reviews.extend(r for r in results if r)
+        finally:
+            if self.on_paper_done is not None:
+                await self.on_paper_done(conf, paper_text)
+
+        if len(reviews) == num_reviews:
+            result = {
+                "paper_id": paper["paper_id"],
+                "title": paper["title"],
+                "reviews": reviews
+            }
+            with open(paper["output_path"], "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+            return True
+        print(f"Incomplete result: {paper['paper_id']} (success {len(reviews)}/{num_reviews})")
+        return False
+
+
+def collect_pending_papers(conf, year, model_dir, label, root_dir="../Data"):
+    """List papers of one label that have a markdown file but no <model_dir> output yet"""
+    mmd_folder = os.path.join(root_dir, conf, year, "markdown", label)
+    review_output_folder = os.path.join(root_dir, conf, year, model_dir, f"{label}_papers")
+    real_review_file = os.path.join(root_dir, conf, year, "real_review", f"{label}_papers", f"{label}_reviews.json")
+
+    if not os.path.exists(real_review_file):
+        print(f"Skipping: Missing real review file {real_review_file}")
+        return []
+
+    os.makedirs(review_output_folder, exist_ok=True)
+
+    with open(real_review_file, "r", encoding="utf-8") as f:
+        real_reviews = json.load(f)
+
+    paper_review_counts = {}
+    paper_titles = {}
+    for p in real_reviews:
+        paper_id = p.get("paper_id") or p.get("id")
+        reviews = p.get("reviews") or []
+        if paper_id:
+            paper_review_counts[paper_id] = len(reviews)
+            paper_titles[paper_id] = p.get("title", "Unknown Title")
+
+    papers = []
+    for mmd_file in os.listdir(mmd_folder):
+        if not mmd_file.endswith(".mmd"):
+            continue
+        paper_id = mmd_file.replace(".mmd", "")
+        output_path = os.path.join(review_output_folder, f"{paper_id}.json")
+        if os.path.exists(output_path):
+            continue
+        papers.append({
+            "paper_id": paper_id,
+            "title": paper_titles.get(paper_id, "Unknown Title"),
+            "num_reviews": paper_review_counts.get(paper_id, 1),
+            "mmd_path": os.path.join(mmd_folder, mmd_file),
+            "output_path": output_path
+        })
+    return papers
@@ -0,0 +1,580 @@
+import re
+import sys
+import json
+import asyncio
+from tqdm import tqdm
+from review_engine import AsyncReviewEngine, collect_pending_papers, CHARS_PER_TOKEN
+
+assistant_instructions_iclr = """
+    You are a professional academic paper reviewer. Evaluate papers based on the grading rubric provided.
+    Return your response in JSON format with the following structure:
+    
+    {
+      "title": "Paper Title",
+      "review": { 
+        "summary": "Briefly summarize the paper and its contributions. This is not the place to critique the paper; the authors should generally agree with a well-written summary.",
+        "soundness": { Please assign the paper a numerical rating on the following scale to indicate the soundness of the technical claims, experimental and research methodology and on whether the central claims of the paper are adequately supported with evidence.
+                        4: excellent
+                        3: good
+                        2: fair
+                        1: poor
+                    },
+        "presentation": { Please assign the paper a numerical rating on the following scale to indicate the quality of the presentation. This should take into account the writing style and clarity, as well as contextualization relative to prior work.
+                            4: excellent
+                            3: good
+                            2: fair
+                            1: poor
+                        },
+        "Contribution": {  Please assign the paper a numerical rating on the following scale to indicate the quality of the overall contribution this paper makes to the research area being studied. Are the questions being asked important? Does the paper bring a significant originality of ideas and/or execution? Are the results valuable to share with the broader ICLR community?
+                            4: excellent
+                            3: good
+                            2: fair
+                            1: poor
+                        },
+        "strengths": "Please provide a thorough assessment of the strengths of the paper, touching on each of the following dimensions: originality, quality, clarity, and significance. We encourage people to be broad in their definitions of originality and significance. For example, originality may arise from creative combinations of existing ideas, application to a new domain, or removing restrictive assumptions from prior theoretical results. You can incorporate Markdown and Latex into your review",
+        "weaknesses": "Please provide a thorough assessment of the weaknesses of the paper, touching on each of the following dimensions: originality, quality, clarity, and significance. We encourage people to be broad in their definitions of originality and significance. For example, originality may arise from creative combinations of existing ideas, application to a new domain, or removing restrictive assumptions from prior theoretical results. You can incorporate Markdown and Latex into your review",
+        "questions": "Please list up and carefully describe any questions and suggestions for the authors. Think of the things where a response from the author can change your opinion, clarify a confusion or address a limitation. This can be very important for a productive rebuttal and discussion phase with the authors.",
+        "overall_rating": Please provide an "overall rating" for this submission. Choices:
+                            10: strong accept, should be highlighted at the conference.
+                            8: accept, good paper.
+                            6: marginally above the acceptance threshold.
+                            5: marginally below the acceptance threshold.
+                            3: reject, not good enough.
+                            1: strong reject.
+,
+        "Reasons for overal_rating": Reasons content,
+        "confidence": Please provide a "confidence score" for your assessment of this submission to indicate how confident you are in your evaluation. 
+                        5: You are absolutely certain about your assessment. You are very familiar with the related work and checked the math/other details carefully.
+                        4: You are confident in your assessment, but not absolutely certain. It is unlikely, but not impossible, that you did not understand some parts of the submission or that you are unfamiliar with some pieces of related work.
+                        3: You are fairly confident in your assessment. It is possible that you did not understand some parts of the submission or that you are unfamiliar with some pieces of related work. Math/other details were not carefully checked.
+                        2: You are willing to defend your assessment, but it is quite likely that you did not understand the central parts of the submission or that you are unfamiliar with some pieces of related work. Math/other details were not carefully checked.
+                        1: Your assessment is an educated guess. The submission is not in your area or the submission was difficult to understand. Math/other details were not carefully checked.
+
+      }
+    }
+    """
+    
+assistant_instructions_neurips = """
+    You are a professional academic paper reviewer. Evaluate papers based on the grading rubric provided.
+    Return your response in JSON format with the following structure:
+    
+    {
+      "title": "Paper Title",
+      "review": { 
+        "summary": "Briefly summarize the paper and its contributions. This is not the place to critique the paper; the authors should generally agree with a well-written summary.",
+        "soundness": { Please assign the paper a numerical rating on the following scale to indicate the soundness of the technical claims, experimental and research methodology and on whether the central claims of the paper are adequately supported with evidence.
+                        4: excellent
+                        3: good
+                        2: fair
+                        1: poor
+                    },
+        "presentation": { Please assign the paper a numerical rating on the following scale to indicate the quality of the presentation. This should take into account the writing style and clarity, as well as contextualization relative to prior work.
+                            4: excellent
+                            3: good
+                            2: fair
+                            1: poor
+                        },
+        "Contribution": {  Please assign the paper a numerical rating on the following scale to indicate the quality of the overall contribution this paper makes to the research area being studied. Are the questions being asked important? Does the paper bring a significant originality of ideas and/or execution? Are the results valuable to share with the broader ICLR community?
+                            4: excellent
+                            3: good
+                            2: fair
+                            1: poor
+                        },
+        "strengths": "Please provide a thorough assessment of the strengths of the paper, touching on each of the following dimensions: a. Originality: Are the tasks or methods new? Is the work a novel combination of well-known techniques? (This can be valuable!) Is it clear how this work differs from previous contributions? Is related work adequately cited?
+                        b. Quality: Is the submission technically sound? Are claims well supported (e.g., by theoretical analysis or experimental results)? Are the methods used appropriate? Is this a complete piece of work or work in progress? Are the authors careful and honest about evaluating both the strengths and weaknesses of their work?
+                        c. Clarity: Is the submission clearly written? Is it well organized? (If not, please make constructive suggestions for improving its clarity.) Does it adequately inform the reader? (Note that a superbly written paper provides enough information for an expert reader to reproduce its results.)
+                        d. Significance: Are the results important? Are others (researchers or practitioners) likely to use the ideas or build on them? Does the submission address a difficult task in a better way than previous work? Does it advance the state of the art in a demonstrable way? Does it provide unique data, unique conclusions about existing data, or a unique theoretical or experimental approach?
+                        You can incorporate Markdown and Latex into your review.", 
+        "weaknesses": "Please provide a thorough assessment of the weaknesses of the paper, touching on each of the following dimensions: a. Originality: Are the tasks or methods new? Is the work a novel combination of well-known techniques? (This can be valuable!) Is it clear how this work differs from previous contributions? Is related work adequately cited?
+                        b. Quality: Is the submission technically sound? Are claims well supported (e.g., by theoretical analysis or experimental results)? Are the methods used appropriate? Is this a complete piece of work or work in progress? Are the authors careful and honest about evaluating both the strengths and weaknesses of their work?
+                        c. Clarity: Is the submission clearly written? Is it well organized? (If not, please make constructive suggestions for improving its clarity.) Does it adequately inform the reader? (Note that a superbly written paper provides enough information for an expert reader to reproduce its results.)
+                        d. Significance: Are the results important? Are others (researchers or practitioners) likely to use the ideas or build on them? Does the submission address a difficult task in a better way than previous work? Does it advance the state of the art in a demonstrable way? Does it provide unique data, unique conclusions about existing data, or a unique theoretical or experimental approach?
+                        You can incorporate Markdown and Latex into your review.",
+        "questions": "Please list up and carefully describe any questions and suggestions for the authors. Think of the things where a response from the author can change your opinion, clarify a confusion or address a limitation. This can be very important for a productive rebuttal and discussion phase with the authors.",
+        "overall_rating": Please provide an "overall rating" for this submission. Choices:
+                            10: Award quality: Technically flawless paper with groundbreaking impact on one or more areas of AI, with exceptionally strong evaluation, reproducibility, and resources, and no unaddressed ethical considerations.
+                            9: Very Strong Accept: Technically flawless paper with groundbreaking impact on at least one area of AI and excellent impact on multiple areas of AI, with flawless evaluation, resources, and reproducibility, and no unaddressed ethical considerations.
+                            8: Strong Accept: Technically strong paper with, with novel ideas, excellent impact on at least one area of AI or high-to-excellent impact on multiple areas of AI, with excellent evaluation, resources, and reproducibility, and no unaddressed ethical considerations.
+                            7: Accept: Technically solid paper, with high impact on at least one sub-area of AI or moderate-to-high impact on more than one area of AI, with good-to-excellent evaluation, resources, reproducibility, and no unaddressed ethical considerations.
+                            6: Weak Accept: Technically solid, moderate-to-high impact paper, with no major concerns with respect to evaluation, resources, reproducibility, ethical considerations.
+                            5: Borderline accept: Technically solid paper where reasons to accept outweigh reasons to reject, e.g., limited evaluation. Please use sparingly.
+                            4: Borderline reject: Technically solid paper where reasons to reject, e.g., limited evaluation, outweigh reasons to accept, e.g., good evaluation. Please use sparingly.
+                            3: Reject: For instance, a paper with technical flaws, weak evaluation, inadequate reproducibility and incompletely addressed ethical considerations.
+                            2: Strong Reject: For instance, a paper with major technical flaws, and/or poor evaluation, limited impact, poor reproducibility and mostly unaddressed ethical considerations.
+                            1: Very Strong Reject: For instance, a paper with trivial results or unaddressed ethical considerations.
+        "Reasons for overall_rating": Reasons content,
+        "confidence": Please provide a "confidence score" for your assessment of this submission to indicate how confident you are in your evaluation. 
+                        5: You are absolutely certain about your assessment. You are very familiar with the related work and checked the math/other details carefully.
+                        4: You are confident in your assessment, but not absolutely certain. It is unlikely, but not impossible, that you did not understand some parts of the submission or that you are unfamiliar with some pieces of related work.
+                        3: You are fairly confident in your assessment. It is possible that you did not understand some parts of the submission or that you are unfamiliar with some pieces of related work. Math/other details were not carefully checked.
+                        2: You are willing to defend your assessment, but it is quite likely that you did not understand the central parts of the submission or that you are unfamiliar with some pieces of related work. Math/other details were not carefully checked.
+                        1: Your assessment is an educated guess. The submission is not in your area or the submission was difficult to understand. Math/other details were not carefully checked.
+
+      }
+    }
+    """
+
+OPENAI_API_KEY="Your_API_Key"
+CLAUDE_API_KEY="Your_API_Key"
+GEMINI_API_KEY="Your_API_Key"
+VLLM_BASE_URL="http://localhost:8000/v1"
+
+
+def extract_text_from_mmd(mmd_path):
+    with open(mmd_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    content = re.sub(r"(##\s*References\b[\s\S]*?)(\n##\s+[^\n]+)", r"\2", content)
+    return content.strip()
+
+
+# Fix illegal escape characters in generated content
+def fix_illegal_escapes(text):
+    return re.sub(r'(?<!\\)\\(?![nrt"\\/bfu])', r'\\\\', text)
+
+
+def extract_fenced_json(content):
+    match = re.search(r"```json\s*(\{.*?\})\s*```", content, re.DOTALL)
+    return match.group(1) if match else content
+
+
+def extract_valid_json(text: str):
+    json_start = text.find('{')
+    if json_start == -1:
+        return None
+    text = text[json_start:]
+
+    stack = []
+    end = -1
+    for i, char in enumerate(text):
+        if char == '{':
+            stack.append(char)
+        elif char == '}':
+            if stack:
+                stack.pop()
+                if not stack:
+                    end = i + 1
+                    break
+    if end == -1:
+        return None
+
+    json_str = text[:end]
+
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+
+        cleaned = re.sub(r'[\x00-\x1F\x7F]', '', json_str)
+        try:
+            return json.loads(cleaned)
+        except Exception as e2:
+            print(f" Failed to decode JSON: {e2}")
+            print("Preview:", cleaned[:200])
+            return None
+
+
+def write_debug_log(path, tag, content):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"\n\n===== {tag} OUTPUT START =====\n")
+        f.write(content)
+        f.write(f"\n===== {tag} OUTPUT END =====\n")
+
+
+# ===== Provider adapters =====
+class ProviderAdapter:
+    """
+    One LLM provider. Subclasses implement `agenerate` (a single attempt that raises on failure);
+    retries, concurrency and rate limits are handled by AsyncReviewEngine.
+
+    Prompts are laid out as rubric instructions followed by the paper text so the pair forms a
+    stable prefix shared by every sample of the same paper, which is what provider prompt caches key on.
+    """
+    name = None               # outputs go to <name>_review/<label>_papers/
+    model = None
+    debug_log = None
+    debug_tag = None
+    concurrency = 8
+    rpm = None
+    tpm = None
+    # Send one sample first so the remaining samples of a paper hit a warm prompt cache
+    warm_cache = False
+    # Provider can return several samples from one request (agenerate_n), at most max_samples at a time
+    multi_sample = False
+    max_samples = None
+
+    def __init__(self):
+        self.usage = {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+
+    def instructions(self, conf):
+        return assistant_instructions_iclr if conf == "ICLR" else assistant_instructions_neurips
+
+    def user_message(self, paper_text):
+        return f"Here is the research paper for review:\n\n{paper_text}"
+
+    def parse(self, content):
+        content = extract_fenced_json(content)
+        write_debug_log(self.debug_log, self.debug_tag, content)
+        review_json = json.loads(content)
+        return review_json.get("review", review_json)
+
+    def parse_sample(self, content):
+        """Validate one sample of a multi-sample response; None if it is not a usable review"""
+        try:
+            return self.parse(content)
+        except Exception as e:
+            print(f"Sample failed validation: {e}")
+            return None
+
+    def record_usage(self, input_tokens, cached_tokens, output_tokens):
+        """Accumulate token usage and append the per-call record to ../<name>_usage_log.jsonl"""
+        record = {
+            "model": self.model,
+            "input_tokens": input_tokens or 0,
+            "cached_tokens": cached_tokens or 0,
+            "output_tokens": output_tokens or 0,
+        }
+        self.usage["calls"] += 1
+        for key in ("input_tokens", "cached_tokens", "output_tokens"):
+            self.usage[key] += record[key]
+        with open(f"../{self.name}_usage_log.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def report_usage(self):
+        u = self.usage
+        ratio = u["cached_tokens"] / u["input_tokens"] if u["input_tokens"] else 0.0
+        print(f"{self.name}: {u['calls']} calls, {u['input_tokens']} input tokens "
+              f"({u['cached_tokens']} cached, {ratio:.1%}), {u['output_tokens']} output tokens")
+
+    async def agenerate(self, conf, paper_text):
+        raise NotImplementedError
+
+    async def agenerate_n(self, conf, paper_text, n):
+        raise NotImplementedError
+
+    def batch_body(self, conf, paper_text):
+        """Request body for one sample in a provider batch job (see batch_reviewer.py)"""
+        raise NotImplementedError
+
+    async def release(self, conf, paper_text):
+        """Called once all samples of a paper are done; drop any per-paper cache"""
+        pass
+
+    def engine(self):
+        return AsyncReviewEngine(self.agenerate, self.concurrency, self.rpm, self.tpm,
+                                 on_paper_done=self.release, warm_first=self.warm_cache,
+                                 generate_n=self.agenerate_n if self.multi_sample else None,
+                                 max_samples=self.max_samples)
+
+
+class OpenAIAdapter(ProviderAdapter):
+    """OpenAI caches prompt prefixes of 1024+ tokens automatically; cached tokens are read from usage"""
+    name = "gpt"
+    model = "gpt-4o"
+    debug_log = "../debug_log.txt"
+    debug_tag = "GPT"
+    rpm = 500
+    tpm = 450000
+    warm_cache = True
+    multi_sample = True
+    max_samples = 128
+
+    def __init__(self, api_key=OPENAI_API_KEY, base_url=None, model=None):
+        super().__init__()
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        self.model = model or self.model
+
+    def messages(self, conf, paper_text):
+        return [
+            {"role": "system", "content": self.instructions(conf)},
+            {"role": "user", "content": self.user_message(paper_text)}
+        ]
+
+    def batch_body(self, conf, paper_text):
+        return {
+            "model": self.model,
+            "messages": self.messages(conf, paper_text),
+            "response_format": {"type": "json_object"}
+        }
+
+    def record_response_usage(self, response):
+        usage = response.usage
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) if details else 0
+        self.record_usage(usage.prompt_tokens, cached, usage.completion_tokens)
+
+    async def agenerate(self, conf, paper_text):
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self.messages(conf, paper_text),
+            response_format={"type": "json_object"}
+        )
+        self.record_response_usage(response)
+        return self.parse(response.choices[0].message.content.strip())
+
+    async def agenerate_n(self, conf, paper_text, n):
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self.messages(conf, paper_text),
+            response_format={"type": "json_object"},
+            n=n
+        )
+        self.record_response_usage(response)
+        samples = [self.parse_sample((choice.message.content or "").strip()) for choice in response.choices]
+        return samples + [None] * (n - len(samples))
+
+
+class ClaudeAdapter(ProviderAdapter):
+    """Claude through the native Messages API, with cache_control on the rubric + paper prefix"""
+    name = "claude"
+    model = "claude-3-5-sonnet-20241022"
+    debug_log = "../claude_debug_log.txt"
+    debug_tag = "GPT"
+    concurrency = 4
+    rpm = 50
+    tpm = 80000
+    max_tokens = 4096
+    warm_cache = True
+
+    def __init__(self, api_key=CLAUDE_API_KEY, model=None):
+        super().__init__()
+        from anthropic import AsyncAnthropic
+        self.client = AsyncAnthropic(api_key=api_key)
+        self.model = model or self.model
+
+    def instructions(self, conf):
+        return super().instructions(conf).replace(
+            "Return your response in JSON format with the following structure:",
+            "Only return your response in JSON format with the following structure, "
+            "Please follow the pattern strictly and no other information should be generated:",
+        )
+
+    def request(self, conf, paper_text):
+        # The breakpoint on the paper block caches system rubric + paper as one prefix
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "system": [{"type": "text", "text": self.instructions(conf)}],
+            "messages": [{
+                "role": "user",
+                "content": [{
+                    "type": "text",
+                    "text": self.user_message(paper_text),
+                    "cache_control": {"type": "ephemeral"},
+                }],
+            }],
+        }
+
+    def batch_body(self, conf, paper_text):
+        return self.request(conf, paper_text)
+
+    def parse(self, content):
+        review_json = extract_valid_json(content)
+        if review_json is None:
+            raise ValueError("Failed to extract valid JSON")
+        write_debug_log(self.debug_log, self.debug_tag, json.dumps(review_json, indent=2, ensure_ascii=False))
+        return review_json.get("review", review_json)
+
+    async def agenerate(self, conf, paper_text):
+        response = await self.client.messages.create(**self.request(conf, paper_text))
+        usage = response.usage
+        cached = usage.cache_read_input_tokens or 0
+        written = usage.cache_creation_input_tokens or 0
+        self.record_usage(usage.input_tokens + cached + written, cached, usage.output_tokens)
+        return self.parse(response.content[0].text.strip())
+
+
+class GeminiAdapter(ProviderAdapter):
+    """Gemini with one explicit CachedContent (rubric + paper) per paper, released when the paper is done"""
+    name = "gemini"
+    model = "gemini-2.0-flash-001"
+    debug_log = "../gemini_debug_log.txt"
+    debug_tag = "GEMINI"
+    rpm = 2000
+    tpm = 4000000
+    cache_ttl = "900s"
+    warm_cache = True
+    multi_sample = True
+    # candidate_count is limited to 8
+    max_samples = 8
+
+    def __init__(self, api_key=GEMINI_API_KEY, model=None):
+        super().__init__()
+        from google import genai
+        from google.genai import types
+        self.client = genai.Client(api_key=api_key)
+        self.types = types
+        self.model = model or self.model
+        # (conf, paper hash) -> task resolving to the cache name (None if the prompt cannot be cached),
+        # so concurrent samples of one paper share a single creation without blocking other papers
+        self.caches = {}
+        self.limiter = None
+
+    def instructions(self, conf):
+        return super().instructions(conf).replace('"Reasons for overal_rating"', '"Reasons for overall_rating"')
+
+    def engine(self):
+        """Cache creation is a request too, so it shares the engine's rpm/tpm limiter"""
+        engine = super().engine()
+        self.limiter = engine.limiter
+        return engine
+
+    def prompt(self, conf, paper_text):
+        return f"{self.instructions(conf).strip()}\n\n{self.user_message(paper_text)}"
+
+    def parse(self, content):
+        content = extract_fenced_json(content)
+        write_debug_log(self.debug_log, self.debug_tag, content)
+        review_json = json.loads(fix_illegal_escapes(content))
+        return review_json.get("review", review_json)
+
+    async def create_cache(self, conf, paper_text):
+        prompt = self.prompt(conf, paper_text)
+        if self.limiter is not None:
+            await self.limiter.acquire(len(prompt) // CHARS_PER_TOKEN)
+        try:
+            cache = await self.client.aio.caches.create(
+                model=self.model,
+                config=self.types.CreateCachedContentConfig(contents=[prompt], ttl=self.cache_ttl),
+            )
+            return cache.name
+        except Exception as e:
+            # e.g. prompt below the minimum cacheable size
+            print(f"Gemini cache unavailable, sending full prompt: {e}")
+            return None
+
+    async def cached_content(self, conf, paper_text):
+        """Create (once) the CachedContent for this paper; None if the prompt cannot be cached"""
+        key = (conf, hash(paper_text))
+        if key not in self.caches:
+            self.caches[key] = asyncio.ensure_future(self.create_cache(conf, paper_text))
+        return await asyncio.shield(self.caches[key])
+
+    async def request(self, conf, paper_text, n=1):
+        cache_name = await self.cached_content(conf, paper_text)
+        if cache_name:
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents="Write the review now.",
+                config=self.types.GenerateContentConfig(cached_content=cache_name, candidate_count=n),
+            )
+        else:
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=self.prompt(conf, paper_text),
+                config=self.types.GenerateContentConfig(candidate_count=n),
+            )
+        usage = response.usage_metadata
+        if usage is not None:
+            self.record_usage(usage.prompt_token_count, usage.cached_content_token_count, usage.candidates_token_count)
+        return response
+
+    async def agenerate(self, conf, paper_text):
+        response = await self.request(conf, paper_text)
+        return self.parse(response.text.strip())
+
+    async def agenerate_n(self, conf, paper_text, n):
+        response = await self.request(conf, paper_text, n)
+        samples = []
+        for candidate in response.candidates or []:
+            parts = candidate.content.parts if candidate.content else []
+            samples.append(self.parse_sample("".join(part.text or "" for part in parts).strip()))
+        return samples + [None] * (n - len(samples))
+
+    async def release(self, conf, paper_text):
+        task = self.caches.pop((conf, hash(paper_text)), None)
+        cache_name = await task if task is not None else None
+        if cache_name:
+            try:
+                await self.client.aio.caches.delete(name=cache_name)
+            except Exception as e:
+                print(f"Failed to delete Gemini cache {cache_name}: {e}")
+
+
+class VLLMAdapter(OpenAIAdapter):
+    """Local open-weight model served by vLLM's OpenAI-compatible server (prefix caching is server-side)"""
+    concurrency = 16
+    rpm = None
+    tpm = None
+
+    def __init__(self, name, model, base_url=VLLM_BASE_URL):
+        super().__init__(api_key="EMPTY", base_url=base_url, model=model)
+        self.name = name
+        self.debug_log = f"../{name}_debug_log.txt"
+        self.debug_tag = name.upper()
+
+    def parse(self, content):
+        review_json = extract_valid_json(content)
+        if review_json is None:
+            raise ValueError("Failed to extract valid JSON")
+        write_debug_log(self.debug_log, self.debug_tag, json.dumps(review_json, indent=2, ensure_ascii=False))
+        return review_json.get("review", review_json)
+
+
+def make_adapter(name):
+    if name == "gpt":
+        return OpenAIAdapter()
+    if name == "claude":
+        return ClaudeAdapter()
+    if name == "gemini":
+        return GeminiAdapter()
+    if name == "llama":
+        return VLLMAdapter("llama", "meta-llama/Llama-3.3-70B-Instruct")
+    if name == "qwen":
+        return VLLMAdapter("qwen", "Qwen/Qwen2.5-72B-Instruct")
+    raise ValueError(f"Unknown provider: {name}")
+
+
+# ===== Fan-out driver =====
+def collect_jobs(conf, year, label, adapters, root_dir="../Data"):
+    """Group pending outputs by paper: {paper_id: {"mmd_path": ..., "jobs": {provider: paper}}}"""
+    papers = {}
+    for adapter in adapters:
+        for paper in collect_pending_papers(conf, year, f"{adapter.name}_review", label, root_dir):
+            entry = papers.setdefault(paper["paper_id"], {"mmd_path": paper["mmd_path"], "jobs": {}})
+            entry["jobs"][adapter.name] = paper
+    return papers
+
+
+async def review_paper_all(conf, entry, engines):
+    """Read and preprocess the paper once, then generate for every pending provider concurrently"""
+    paper_text = extract_text_from_mmd(entry["mmd_path"])
+    names = list(entry["jobs"])
+    results = await asyncio.gather(*[engines[name].review_paper(conf, entry["jobs"][name], paper_text) for name in names])
+    return dict(zip(names, results))
+
+
+async def process_one(conf, year, adapters, root_dir="../Data", max_papers_in_flight=16):
+    engines = {adapter.name: adapter.engine() for adapter in adapters}
+    paper_slots = asyncio.Semaphore(max_papers_in_flight)
+
+    async def bounded(entry):
+        async with paper_slots:
+            return await review_paper_all(conf, entry, engines)
+
+    for label in ["good", "borderline", "bad"]:
+        papers = collect_jobs(conf, year, label, adapters, root_dir)
+        if not papers:
+            continue
+
+        saved = {adapter.name: 0 for adapter in adapters}
+        tasks = [asyncio.create_task(bounded(entry)) for entry in papers.values()]
+        for task in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc=f"{conf}{year} - {label}"):
+            for name, ok in (await task).items():
+                saved[name] += ok
+        print(f"{conf}{year} - {label}: saved " + ", ".join(f"{name} {n}" for name, n in saved.items()))
+
+
+async def process_all(providers, venues=None):
+    adapters = [make_adapter(name) for name in providers]
+    venues = venues or [("ICLR", "2024"), ("ICLR", "2025"), ("NeurIPS", "2023"), ("NeurIPS", "2024")]
+    for conf, year in venues:
+        await process_one(conf, year, adapters)
+    for adapter in adapters:
+        adapter.report_usage()
+
+
+# Usage: python reviewer.py [gpt] [claude] [gemini] [llama] [qwen]
+if __name__ == "__main__":
+    asyncio.run(process_all(sys.argv[1:] or ["gpt", "claude", "gemini"]))
@@ -0,0 +1,81 @@
+import os
+import json
+import pytest
+import batch_reviewer
+from batch_reviewer import LocalBatchBackend, run_batch, write_chunks
+from reviewer import ProviderAdapter
+
+
+class EchoAdapter(ProviderAdapter):
+    name = "echo"
+    model = "echo-1"
+
+    def batch_body(self, conf, paper_text):
+        return {"conf": conf, "text": paper_text}
+
+
+def respond(body):
+    return json.dumps({"review": {"summary": body["text"][:20]}})
+
+
+def make_venue(root, papers):
+    """ICLR 2024 good papers with a markdown file each and {paper_id: num_reviews} real reviews"""
+    mmd_dir = os.path.join(root, "ICLR", "2024", "markdown", "good")
+    real_dir = os.path.join(root, "ICLR", "2024", "real_review", "good_papers")
+    os.makedirs(mmd_dir)
+    os.makedirs(real_dir)
+    for paper_id in papers:
+        with open(os.path.join(mmd_dir, f"{paper_id}.mmd"), "w", encoding="utf-8") as f:
+            f.write(f"# {paper_id}\n\nAbstract text of {paper_id}.\n")
+    with open(os.path.join(real_dir, "good_reviews.json"), "w", encoding="utf-8") as f:
+        json.dump([{"paper_id": p, "title": p, "reviews": [{}] * n} for p, n in papers.items()], f)
+
+
+def test_chunks_respect_limits_and_keep_papers_together(tmp_path):
+    root = str(tmp_path / "Data")
+    make_venue(root, {"p1": 2, "p2": 3, "p3": 1, "p4": 2})
+    backend = LocalBatchBackend(respond, work_dir=str(tmp_path / "batches"), max_requests=4)
+    chunks = write_chunks(EchoAdapter(), backend, str(tmp_path / "chunks"), [("ICLR", "2024")], root)
+
+    assert len(chunks) > 1
+    seen = set()
+    for chunk in chunks:
+        with open(chunk["input_path"], encoding="utf-8") as f:
+            ids = [json.loads(line)["custom_id"] for line in f]
+        assert len(ids) <= 4
+        assert ids == list(chunk["manifest"])
+        papers = {entry["paper_id"] for entry in chunk["manifest"].values()}
+        assert not papers & seen
+        seen |= papers
+    assert seen == {"p1", "p2", "p3", "p4"}
+
+
+def test_interrupted_run_resumes_remaining_chunks(tmp_path, monkeypatch):
+    root = str(tmp_path / "Data")
+    make_venue(root, {"p1": 2, "p2": 2, "p3": 2})
+    state_dir = str(tmp_path / "batches")
+    backend = LocalBatchBackend(respond, work_dir=state_dir, max_requests=2)
+
+    real_demultiplex = batch_reviewer.demultiplex
+    calls = []
+
+    def interrupt_second(adapter, backend, batch_id, manifest):
+        calls.append(batch_id)
+        if len(calls) == 2:
+            raise RuntimeError("interrupted")
+        return real_demultiplex(adapter, backend, batch_id, manifest)
+
+    adapter = EchoAdapter()
+    adapter.debug_log = str(tmp_path / "debug_log.txt")
+    monkeypatch.setattr(batch_reviewer, "demultiplex", interrupt_second)
+    with pytest.raises(RuntimeError):
+        run_batch(adapter, backend, [("ICLR", "2024")], root, state_dir, poll_interval=0)
+    monkeypatch.setattr(batch_reviewer, "demultiplex", real_demultiplex)
+
+    submitted = len(os.listdir(state_dir))
+    saved = run_batch(adapter, backend, [("ICLR", "2024")], root, state_dir, poll_interval=0)
+    assert saved == 2
+    # Nothing was submitted again on resume
+    assert len(os.listdir(state_dir)) == submitted - 1  # the finished state file is removed
+    out_dir = os.path.join(root, "ICLR", "2024", "echo_review", "good_papers")
+    assert sorted(os.listdir(out_dir)) == ["p1.json", "p2.json", "p3.json"]
@@ -0,0 +1,40 @@
+import os
+import json
+import numpy as np
+from review_dedup import build_report, move_for_regeneration
+from Embedding_store import EmbeddingStore, load_store
+
+
+def key(paper_id, sample_index, model="gpt"):
+    return ("ICLR", "2024", model, "good", paper_id, sample_index)
+
+
+def test_within_paper_duplicate_kept_when_cluster_spans_papers():
+    pairs = [(key("p1", 0), key("p1", 1), 0.9), (key("p1", 1), key("p2", 0), 0.85)]
+    report = build_report(pairs)
+    assert [(e["paper_id"], e["clusters"]) for e in report["papers"]] == [("p1", [[0, 1]])]
+    assert report["cross_paper_clusters"] == [[list(key("p1", 1)), list(key("p2", 0))]]
+
+
+def test_regeneration_invalidates_results_and_vectors(tmp_path):
+    root = str(tmp_path)
+    venue = os.path.join(root, "ICLR", "2024")
+    review = os.path.join(venue, "gpt_review", "good_papers", "p1.json")
+    result = os.path.join(venue, "similarity_results", "gpt_review", "good", "p1.json")
+    for path in (review, result):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"reviews": []}, f)
+
+    stored = [("p1", "section", -1, "method"), ("p1", "gpt", 0, "summary"),
+              ("p1", "real", 0, "summary"), ("p2", "gpt", 0, "summary")]
+    for store_name in ("embedding_store", "embedding_store_int8"):
+        EmbeddingStore(os.path.join(venue, store_name, "good"), dim=4).append(stored, np.eye(4))
+
+    report = build_report([(key("p1", 0), key("p1", 1), 0.9)])
+    assert move_for_regeneration(report, root) == (1, 2)
+    assert os.path.exists(os.path.join(venue, "gpt_review_duplicates", "good_papers", "p1.json"))
+    assert not os.path.exists(review) and not os.path.exists(result)
+    for store_name in ("embedding_store", "embedding_store_int8"):
+        keys, _ = load_store(os.path.join(venue, store_name, "good"))
+        assert keys == [stored[0], stored[2], stored[3]]
@@ -0,0 +1,49 @@
+import json
+import asyncio
+import review_engine
+from review_engine import AsyncReviewEngine
+
+
+def make_paper(tmp_path, num_reviews):
+    return {"paper_id": "p1", "title": "Paper", "num_reviews": num_reviews,
+            "output_path": str(tmp_path / "p1.json")}
+
+
+def run_paper(engine, paper):
+    return asyncio.run(engine.review_paper("ICLR", paper, "paper text"))
+
+
+def test_samples_are_split_by_max_samples(tmp_path, monkeypatch):
+    monkeypatch.setattr(review_engine, "backoff_delay", lambda attempt: 0)
+    calls = []
+
+    async def generate(conf, paper_text):
+        return {"summary": "single"}
+
+    async def generate_n(conf, paper_text, n):
+        calls.append(n)
+        if n > 8:
+            raise ValueError("candidate_count must be at most 8")
+        return [{"summary": f"sample {i}"} for i in range(n)]
+
+    engine = AsyncReviewEngine(generate, generate_n=generate_n, max_samples=8)
+    assert run_paper(engine, make_paper(tmp_path, 9))
+    assert sorted(calls) == [1, 8]
+    with open(tmp_path / "p1.json", "r", encoding="utf-8") as f:
+        assert len(json.load(f)["reviews"]) == 9
+
+
+def test_failed_multi_sample_falls_back_to_single_calls(tmp_path, monkeypatch):
+    monkeypatch.setattr(review_engine, "backoff_delay", lambda attempt: 0)
+    single = []
+
+    async def generate(conf, paper_text):
+        single.append(1)
+        return {"summary": "single"}
+
+    async def generate_n(conf, paper_text, n):
+        raise ValueError("multi-sample requests unavailable")
+
+    engine = AsyncReviewEngine(generate, generate_n=generate_n)
+    assert run_paper(engine, make_paper(tmp_path, 3))
+    assert len(single) == 3
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import openreview
+
+DEFAULT_CACHE_PATH = "../Data/openreview_cache.sqlite"
+
+
+class NotesCache:
+    """
+    Persistent SQLite cache of OpenReview notes, keyed by a hash of the query (forum, invitation, details).
+
+    ttl: seconds a cached query is served without contacting the API (None = never expires,
+         which is what past venues need).
+    offline: never hit the network; missing entries raise KeyError.
+    Expired forum queries only fetch the replies created since the newest cached note (mintcdate)
+    and merge them by id. Other expired queries are re-fetched in full: the API has no
+    modification-date filter, and a submission's directReplies only change by fetching it again.
+    Groups (venue configuration) are cached the same way, so a recorded cache runs fully offline.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=None, offline=False):
+        self.path = path
+        self.ttl = ttl
+        self.offline = offline
+        self.hits = 0
+        self.refreshes = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            "key TEXT PRIMARY KEY, query TEXT, notes TEXT, max_cdate INTEGER, synced_at REAL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS groups (id TEXT PRIMARY KEY, data TEXT, synced_at REAL)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(query):
+        return hashlib.sha256(json.dumps(query, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def note_to_json(note):
+        data = note.to_json()
+        if getattr(note, "details", None):
+            data["details"] = note.details
+        return data
+
+    def _load(self, key):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT notes, max_cdate, synced_at FROM notes WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _store(self, key, query, notes):
+        max_cdate = max((n.get("cdate") or 0 for n in notes), default=0)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(query, sort_keys=True), json.dumps(notes, ensure_ascii=False), max_cdate, time.time()),
+            )
+            self.conn.commit()
+
+    def get_all_notes(self, fetch, forum=None, invitation=None, details=None):
+        """
+        Return openreview.api.Note objects for the query.
+        fetch: callable with the client.get_all_notes signature (e.g. wrapped by FetchEngine.call)
+        """
+        query = {"forum": forum, "invitation": invitation, "details": details}
+        key = self.make_key(query)
+        row = self._load(key)
+        kwargs = {k: v for k, v in query.items() if v is not None}
+
+        if row is not None:
+            cached, max_cdate, synced_at = row
+            fresh = self.ttl is None or time.time() - synced_at < self.ttl
+            if fresh or self.offline:
+                self.hits += 1
+                return [openreview.api.Note.from_json(n) for n in json.loads(cached)]
+            self.refreshes += 1
+            if forum is not None and max_cdate:
+                # Expired forum: only the replies created since the newest cached note, merged by id
+                notes = {n["id"]: n for n in json.loads(cached)}
+                for note in fetch(**kwargs, mintcdate=max_cdate):
+                    notes[note.id] = self.note_to_json(note)
+                notes = list(notes.values())
+                self._store(key, query, notes)
+                return [openreview.api.Note.from_json(n) for n in notes]
+        else:
+            if self.offline:
+                raise KeyError(f"Not in offline cache: {query}")
+            self.misses += 1
+        notes = [self.note_to_json(n) for n in fetch(**kwargs)]
+        self._store(key, query, notes)
+        return [openreview.api.Note.from_json(n) for n in notes]
+
+    def get_group(self, fetch, group_id):
+        """
+        Return the openreview.api.Group with this id.
+        fetch: callable with the client.get_group signature
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT data, synced_at FROM groups WHERE id = ?", (group_id,)).fetchone()
+        if row is not None and (self.offline or self.ttl is None or time.time() - row[1] < self.ttl):
+            self.hits += 1
+            return openreview.api.Group.from_json(json.loads(row[0]))
+        if self.offline:
+            raise KeyError(f"Group not in offline cache: {group_id}")
+        self.misses += 1
+        group = fetch(group_id)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO groups VALUES (?, ?, ?)",
+                (group_id, json.dumps(group.to_json(), ensure_ascii=False), time.time()),
+            )
+            self.conn.commit()
+        return group
+
+    def report(self):
+        print(f"Notes cache: {self.hits} hits, {self.refreshes} refreshes, {self.misses} misses ({self.path})")
+
+    def close(self):
+        self.conn.close()
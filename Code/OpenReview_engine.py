@@ -0,0 +1,137 @@
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import openreview
+import requests
+from tqdm import tqdm
+
+# HTTP status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def get_status(exc):
+    """Best-effort HTTP status of an exception raised by openreview-py / requests"""
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code
+    if isinstance(exc, openreview.OpenReviewException) and exc.args:
+        detail = exc.args[0]
+        if isinstance(detail, dict):
+            return detail.get("status")
+    return None
+
+
+def is_retryable(exc):
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return get_status(exc) in RETRY_STATUS
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchEngine:
+    """
+    Bounded thread pool for blocking OpenReview calls with token-bucket rate limiting,
+    exponential backoff on 429/5xx and results returned in input order
+    """
+
+    def __init__(self, max_workers=8, rate=5.0, burst=None, max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        # Start of the first call or imap, so the reported rate covers every request of the run
+        self.started = None
+
+    def mark_started(self):
+        with self.lock:
+            if self.started is None:
+                self.started = time.monotonic()
+
+    def call(self, fn, *args, **kwargs):
+        """Run one request under the rate limit, retrying transient failures"""
+        self.mark_started()
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            with self.lock:
+                self.requests += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    with self.lock:
+                        self.failures += 1
+                    raise
+                with self.lock:
+                    self.retries += 1
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                time.sleep(delay * (0.5 + random.random() / 2))
+
+    def _call_safe(self, fn, item, rate_limited=True):
+        try:
+            return (self.call(fn, item) if rate_limited else fn(item)), None
+        except Exception as e:
+            return None, e
+
+    def imap(self, fn, items, desc=None, rate_limited=True):
+        """
+        Yield (item, result, error) for each item in input order.
+        At most 2 * max_workers requests are in flight, so results can be consumed as a stream.
+        rate_limited=False runs fn directly, for callables that use self.call only when they hit
+        the network (e.g. cache lookups).
+        """
+        items = list(items)
+        it = iter(items)
+        self.mark_started()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = deque()
+            for item in it:
+                pending.append((item, pool.submit(self._call_safe, fn, item, rate_limited)))
+                if len(pending) >= self.max_workers * 2:
+                    break
+            with tqdm(total=len(items), desc=desc, disable=desc is None) as bar:
+                while pending:
+                    item, future = pending.popleft()
+                    result, error = future.result()
+                    for nxt in it:
+                        pending.append((nxt, pool.submit(self._call_safe, fn, nxt, rate_limited)))
+                        break
+                    bar.update(1)
+                    yield item, result, error
+
+    def map(self, fn, items, desc=None, rate_limited=True):
+        return list(self.imap(fn, items, desc=desc, rate_limited=rate_limited))
+
+    def report(self):
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        rps = self.requests / elapsed if elapsed > 0 else 0.0
+        print(f"OpenReview requests: {self.requests} in {elapsed:.1f}s ({rps:.2f} req/s), "
+              f"retries: {self.retries}, failures: {self.failures}")
@@ -1,33 +1,77 @@
 import os
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
-def download_pdf(paper_id, save_dir):
-    """Download PDF; skip if already exists"""
+CHUNK_SIZE = 1 << 16
+
+def make_session(max_workers=8):
+    """Shared session with a connection pool large enough for all workers"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def is_valid_pdf(path):
+    """A complete download starts with %PDF and contains the %%EOF trailer near the end"""
+    try:
+        with open(path, "rb") as f:
+            if f.read(4) != b"%PDF":
+                return False
+            f.seek(max(0, os.path.getsize(path) - 1024))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+def download_pdf(paper_id, save_dir, session=None):
+    """Download PDF; skip if a valid file already exists, resume partial downloads with HTTP Range"""
     url = f"https://openreview.net/pdf?id={paper_id}"
     os.makedirs(save_dir, exist_ok=True)
     pdf_path = os.path.join(save_dir, f"{paper_id}.pdf")
+    part_path = pdf_path + ".part"
+    session = session or requests
 
     if os.path.exists(pdf_path):
-        return "skipped"  # Already exists
+        if is_valid_pdf(pdf_path):
+            return "skipped"  # Already exists
+        os.remove(pdf_path)  # Truncated or corrupt file from an earlier run
+
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
 
     try:
-        response = requests.get(url, timeout=20)
-        if response.status_code == 200:
-            with open(pdf_path, "wb") as f:
-                f.write(response.content)
-            return "success"
-        else:
-            return f"status_{response.status_code}"
+        with session.get(url, headers=headers, stream=True, timeout=20) as response:
+            if response.status_code == 206:
+                mode = "ab"
+            elif response.status_code == 200:
+                mode = "wb"  # Server ignored the Range header, start over
+            elif response.status_code == 416:
+                mode = None  # Partial file already holds the full body
+            else:
+                return f"status_{response.status_code}"
+
+            if mode is not None:
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+
+        if not is_valid_pdf(part_path):
+            os.remove(part_path)
+            return "error_invalid_pdf"
+        os.replace(part_path, pdf_path)
+        return "success"
     except Exception as e:
         return f"error_{str(e)}"
 
-def download_from_labeled_file(csv_path):
+def download_from_labeled_file(csv_path, max_workers=8, session=None):
     """Read labeled CSV file and download papers by category"""
     df = pd.read_csv(csv_path)
     root_dir = os.path.dirname(csv_path)
     failure_log_path = os.path.join(root_dir, "download_failures.txt")
+    session = session or make_session(max_workers)
 
     # Clear previous failure log
     open(failure_log_path, "w").close()
@@ -38,21 +82,25 @@ def download_from_labeled_file(csv_path):
         save_dir = os.path.join(root_dir, label)
 
         print(f"\n Downloading: {os.path.basename(csv_path)} - {label} ({len(paper_ids)} papers)")
-        for paper_id in tqdm(paper_ids, desc=f"{label}"):
-            result = download_pdf(paper_id, save_dir)
-            if result == "success":
-                tqdm.write(f"Success: {paper_id}")
-            elif result == "skipped":
-                tqdm.write(f"Skipped: {paper_id}")
-            else:
-                tqdm.write(f"Failed: {paper_id} ({result})")
-                with open(failure_log_path, "a") as log_f:
-                    log_f.write(f"{paper_id},{label},{result}\n")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(download_pdf, paper_id, save_dir, session): paper_id for paper_id in paper_ids}
+            for future in tqdm(as_completed(futures), total=len(futures), desc=f"{label}"):
+                paper_id = futures[future]
+                result = future.result()
+                if result == "success":
+                    tqdm.write(f"Success: {paper_id}")
+                elif result == "skipped":
+                    tqdm.write(f"Skipped: {paper_id}")
+                else:
+                    tqdm.write(f"Failed: {paper_id} ({result})")
+                    with open(failure_log_path, "a") as log_f:
+                        log_f.write(f"{paper_id},{label},{result}\n")
 
-def batch_download(file_list):
+def batch_download(file_list, max_workers=8):
+    session = make_session(max_workers)
     for csv_file in file_list:
         if os.path.exists(csv_file):
-            download_from_labeled_file(csv_file)
+            download_from_labeled_file(csv_file, max_workers, session)
         else:
             print(f"File not found: {csv_file}")
 
@@ -65,4 +113,5 @@ file_list = [
 ]
 
 # === Execute download ===
-batch_download(file_list)
+if __name__ == "__main__":
+    batch_download(file_list, max_workers=8)
@@ -4,21 +4,28 @@ import matplotlib.pyplot as plt
 import numpy as np
 from scipy.stats import norm
 import os
-from tqdm import tqdm
 import json
+from OpenReview_engine import FetchEngine
+from OpenReview_cache import NotesCache
 
 OPENREVIEW_USERNAME = "Your_Username"
 OPENREVIEW_PASSWORD = "Your_Password"
 
 class PaperFetcherWithRatingStats:
 
-    def __init__(self, conference_name: str, year: str):
+    def __init__(self, conference_name: str, year: str, max_workers=8, rate=5.0, cache: NotesCache = None):
         print("Initialing OpenReview ...")
-        self.client = openreview.api.OpenReviewClient(
-            baseurl="https://api2.openreview.net",
-            username=OPENREVIEW_USERNAME,
-            password=OPENREVIEW_PASSWORD,
-        )
+        # An offline cache replays recorded responses, so no login is needed
+        if cache is not None and cache.offline:
+            self.client = None
+        else:
+            self.client = openreview.api.OpenReviewClient(
+                baseurl="https://api2.openreview.net",
+                username=OPENREVIEW_USERNAME,
+                password=OPENREVIEW_PASSWORD,
+            )
+        self.engine = FetchEngine(max_workers=max_workers, rate=rate)
+        self.cache = cache
 
         self.conference_name = conference_name
         self.year = year
@@ -27,42 +34,104 @@ class PaperFetcherWithRatingStats:
         self.paper_dir = os.path.join(self.root_dir, "papers")
         os.makedirs(self.paper_dir, exist_ok=True)
 
-        group = self.client.get_group(self.venue_id)
+        group = self.get_group(self.venue_id)
         content = group.content
         self.submission_invitation = content["submission_id"]["value"]
         self.review_invitation_name = content["review_name"]["value"]
 
+    def get_group(self, group_id):
+        """client.get_group through the engine, served from the cache when configured"""
+        def fetch(gid):
+            return self.engine.call(self.client.get_group, gid)
+        if self.cache is None:
+            return fetch(group_id)
+        return self.cache.get_group(fetch, group_id)
+
+    def get_all_notes(self, **kwargs):
+        """client.get_all_notes through the rate-limited engine, served from the cache when configured"""
+        def fetch(**query):
+            return self.engine.call(self.client.get_all_notes, **query)
+        if self.cache is None:
+            return fetch(**kwargs)
+        return self.cache.get_all_notes(fetch, **kwargs)
+
     def fetch_submissions(self):
         print("Fetching paper submission information...")
-        submissions = self.client.get_all_notes(invitation=self.submission_invitation, details="directReplies")
+        submissions = self.get_all_notes(invitation=self.submission_invitation, details="directReplies")
         print(f"Retrieved {len(submissions)} submissions")
         return submissions
 
-    def extract_rating_stats(self, paper_id):
-        reviews = self.client.get_all_notes(forum=paper_id)
+    def parse_ratings(self, replies):
+        """Collect numeric ratings from review replies (Note objects or directReplies dicts)"""
         ratings = []
-        for reply in reviews:
-            if any(inv.endswith(f"/-/{self.review_invitation_name}") for inv in reply.invitations):
-                rating_data = reply.content.get("rating", {})
+        for reply in replies:
+            if isinstance(reply, dict):
+                invitations = reply.get("invitations", [])
+                content = reply.get("content", {})
+            else:
+                invitations = reply.invitations
+                content = reply.content
+            if any(inv.endswith(f"/-/{self.review_invitation_name}") for inv in invitations):
+                rating_data = content.get("rating", {})
                 if isinstance(rating_data, dict) and "value" in rating_data:
                     try:
                         rating = float(str(rating_data["value"]).split(":")[0].strip())
                         ratings.append(rating)
                     except ValueError:
                         continue
+        return ratings
+
+    def rating_stats(self, ratings):
         if ratings:
             return np.mean(ratings), np.std(ratings)
         else:
             return None, None
 
-    def process_papers(self):
+    def extract_rating_stats(self, paper_id):
+        reviews = self.get_all_notes(forum=paper_id)
+        return self.rating_stats(self.parse_ratings(reviews))
+
+    def extract_rating_stats_from_replies(self, submission):
+        """Use the directReplies already fetched with the submission; None if they are missing"""
+        details = submission.details or {}
+        replies = details.get("directReplies")
+        if replies is None:
+            return None
+        return self.rating_stats(self.parse_ratings(replies))
+
+    def process_papers(self, use_direct_replies=True):
+        """
+        use_direct_replies: compute ratings from the directReplies returned by the bulk
+        submission query, falling back to one forum request only for submissions without them
+        """
         submissions = self.fetch_submissions()
-        papers_data = []
+        stats_by_id = {}
 
-        for submission in tqdm(submissions, desc="Extracting Score"):
+        if use_direct_replies:
+            for submission in submissions:
+                stats = self.extract_rating_stats_from_replies(submission)
+                if stats is not None:
+                    stats_by_id[submission.id] = stats
+
+        # Per-forum requests only for submissions without usable directReplies
+        missing_ids = [s.id for s in submissions if s.id not in stats_by_id]
+        if use_direct_replies:
+            print(f"Per-forum fallback requests: {len(missing_ids)}/{len(submissions)}")
+        papers = self.engine.imap(self.extract_rating_stats, missing_ids, desc="Extracting Score", rate_limited=False)
+        for paper_id, stats, error in papers:
+            if error is not None:
+                print(f"Failed to fetch: {paper_id} - {error}")
+                continue
+            stats_by_id[paper_id] = stats
+        self.engine.report()
+        if self.cache is not None:
+            self.cache.report()
+
+        papers_data = []
+        for submission in submissions:
             paper_id = submission.id
             title = submission.content.get("title", {}).get("value", "Unknown Title")
-            avg_rating, std_rating = self.extract_rating_stats(paper_id)
+            avg_rating, std_rating = stats_by_id.get(paper_id, (None, None))
             if avg_rating is not None:
                 papers_data.append({
                     "id": paper_id,
@@ -78,5 +147,5 @@ class PaperFetcherWithRatingStats:
         return df
     
 # Examples 
-# fetcher = PaperFetcherWithRatingStats("NeurIPS", "2023")
+# fetcher = PaperFetcherWithRatingStats("NeurIPS", "2023", cache=NotesCache())
 # df = fetcher.process_papers()
\ No newline at end of file
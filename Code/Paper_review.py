@@ -2,7 +2,8 @@ import openreview
 import pandas as pd
 import json
 import os
-from tqdm import tqdm
+from OpenReview_engine import FetchEngine
+from OpenReview_cache import NotesCache
 
 OPENREVIEW_USERNAME = "Your_Username"
 OPENREVIEW_PASSWORD = "Your_Password"
@@ -17,34 +18,71 @@ def init_client():
     )
     return client
 
-# Fetch and save reviews by label
-def fetch_reviews_and_save(client, df, label, save_dir):
-    all_reviews = []
+# Read completed paper ids from an existing dump, dropping a partially written last line
+def load_completed_ids(out_path):
+    completed = set()
+    if not os.path.exists(out_path):
+        return completed
 
-    for _, row in tqdm(df.iterrows(), total=len(df), desc=f"Fetching {label} reviews"):
-        paper_id = row["id"]
-        title = row["title"]
-        try:
-            paper_notes = client.get_all_notes(forum=paper_id)
-            all_replies = [note.to_json() for note in paper_notes]
-        except Exception as e:
-            print(f"Failed to fetch: {paper_id} - {e}")
-            continue
+    valid_end = 0
+    with open(out_path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            completed.add(record["paper_id"])
+            valid_end += len(line)
+    if valid_end < os.path.getsize(out_path):
+        with open(out_path, "r+b") as f:
+            f.truncate(valid_end)
+    return completed
 
-        all_reviews.append({
-            "paper_id": paper_id,
-            "title": title,
-            "all_replies": all_replies
-        })
+# Fetch reviews by label and stream one JSON record per paper to <label>_papers_reviews.jsonl
+def fetch_reviews_and_save(client, df, label, save_dir, engine=None, cache=None, fsync_every=50):
+    engine = engine or FetchEngine()
+    titles = dict(zip(df["id"], df["title"]))
 
     os.makedirs(save_dir, exist_ok=True)
-    out_path = os.path.join(save_dir, f"{label}_papers_reviews.json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(all_reviews, f, indent=2, ensure_ascii=False)
+    out_path = os.path.join(save_dir, f"{label}_papers_reviews.jsonl")
+    completed = load_completed_ids(out_path)
+    paper_ids = [paper_id for paper_id in df["id"] if paper_id not in completed]
+    if completed:
+        print(f"Resuming {label}: {len(completed)} papers already saved, {len(paper_ids)} remaining")
+
+    def fetch_notes(**kwargs):
+        return engine.call(client.get_all_notes, **kwargs)
+
+    def fetch_forum(paper_id):
+        if cache is None:
+            return fetch_notes(forum=paper_id)
+        return cache.get_all_notes(fetch_notes, forum=paper_id)
+
+    papers = engine.imap(fetch_forum, paper_ids, desc=f"Fetching {label} reviews", rate_limited=False)
+    with open(out_path, "a", encoding="utf-8") as f:
+        unsynced = 0
+        for paper_id, paper_notes, error in papers:
+            if error is not None:
+                print(f"Failed to fetch: {paper_id} - {error}")
+                continue
+
+            record = {
+                "paper_id": paper_id,
+                "title": titles[paper_id],
+                "all_replies": [note.to_json() for note in paper_notes]
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            unsynced += 1
+            if unsynced >= fsync_every:
+                f.flush()
+                os.fsync(f.fileno())
+                unsynced = 0
+        f.flush()
+        os.fsync(f.fileno())
     print(f"Saved to: {out_path}")
 
 # Main process for a CSV file
-def process_csv(client, csv_path):
+def process_csv(client, csv_path, engine=None, cache=None):
     print(f"\n Processing file: {csv_path}")
     df = pd.read_csv(csv_path)
     save_dir = os.path.dirname(csv_path)
@@ -52,7 +90,7 @@ def process_csv(client, csv_path):
     for label in ["good", "borderline", "bad"]:
         df_label = df[df["label"] == label]
         if not df_label.empty:
-            fetch_reviews_and_save(client, df_label, label, save_dir)
+            fetch_reviews_and_save(client, df_label, label, save_dir, engine, cache)
 
 # === Entry point ===
 if __name__ == "__main__":
@@ -63,6 +101,12 @@ if __name__ == "__main__":
         "../Data/NeurIPS/2024/papers/NeurIPS2024_papers_avg_rating_consistent_labeled.csv"
     ]
 
+    # Reviews of past venues never change, so cached forums are served without expiry.
+    # Use NotesCache(offline=True) with client=None to replay a recorded cache without network.
     client = init_client()
+    engine = FetchEngine(max_workers=8, rate=5.0)
+    cache = NotesCache(ttl=None)
     for csv_path in csv_paths:
-        process_csv(client, csv_path)
+        process_csv(client, csv_path, engine, cache)
+    engine.report()
+    cache.report()
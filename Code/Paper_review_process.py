@@ -26,6 +26,21 @@ class ReviewProcessor:
                 return int(match.group(1))
         return None
 
+    def iter_papers(self, input_path):
+        """Yield paper records from the streamed JSONL dump, or from a legacy JSON array"""
+        if input_path.endswith(".jsonl"):
+            with open(input_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"Skipping truncated line in: {input_path}")
+        else:
+            with open(input_path, "r", encoding="utf-8") as f:
+                yield from json.load(f)
+
     def process_all(self):
         """Process reviews for all conferences and years"""
         for conf, years in self.venue_years.items():
@@ -39,7 +54,9 @@ class ReviewProcessor:
         real_review_dir = os.path.join(self.root_dir, conf, year, "real_review")
 
         for label in self.labels:
-            input_path = os.path.join(paper_dir, f"{label}_papers_reviews.json")
+            input_path = os.path.join(paper_dir, f"{label}_papers_reviews.jsonl")
+            if not os.path.exists(input_path):
+                input_path = os.path.join(paper_dir, f"{label}_papers_reviews.json")
             output_folder = os.path.join(real_review_dir, f"{label}_papers")
             os.makedirs(output_folder, exist_ok=True)
 
@@ -48,56 +65,56 @@ class ReviewProcessor:
                 continue
 
             print(f"\n Processing: {input_path}")
+            paper_data = self.iter_papers(input_path)
             try:
-                with open(input_path, "r", encoding="utf-8") as f:
-                    paper_data = json.load(f)
+                formatted_reviews = list(self.process_papers(paper_data, f"{conf}{year} - {label}"))
             except json.JSONDecodeError:
                 print(f"Failed to parse JSON: {input_path}")
                 continue
 
-            formatted_reviews = []
-
-            for paper in tqdm(paper_data, desc=f"{conf}{year} - {label}"):
-                paper_id = paper.get("paper_id", "unknown")
-                title = paper.get("title", "Untitled")
-                reviews = []
-
-                for reply in paper.get("all_replies", []):
-                    content = reply.get("content", {})
-                    review_id = reply.get("id", "unknown")
-
-                    # Only process reviews that contain all required fields
-                    if "summary" in content and "soundness" in content:
-                        try:
-                            review_data = {
-                                "review_id": review_id,
-                                "summary": content["summary"]["value"],
-                                "soundness": self.parse_score(content["soundness"]["value"]),
-                                "presentation": self.parse_score(content["presentation"]["value"]),
-                                "contribution": self.parse_score(content["contribution"]["value"]),
-                                "strengths": content["strengths"]["value"],
-                                "weaknesses": content["weaknesses"]["value"],
-                                "questions": content["questions"]["value"],
-                                "overall_rating": self.parse_score(content["rating"]["value"]),
-                                "confidence": self.parse_score(content["confidence"]["value"])
-                            }
-                            reviews.append(review_data)
-                        except Exception as e:
-                            print(f"Failed to parse review {review_id}: {e}")
-
-                if reviews:
-                    formatted_reviews.append({
-                        "paper_id": paper_id,
-                        "title": title,
-                        "reviews": reviews
-                    })
-
             output_path = os.path.join(output_folder, f"{label}_reviews.json")
             with open(output_path, "w", encoding="utf-8") as f:
                 json.dump(formatted_reviews, f, indent=2, ensure_ascii=False)
 
             print(f"Saved to: {output_path}")
 
+    def process_papers(self, paper_data, desc):
+        """Yield formatted real reviews for each paper record that has complete reviews"""
+        for paper in tqdm(paper_data, desc=desc):
+            paper_id = paper.get("paper_id", "unknown")
+            title = paper.get("title", "Untitled")
+            reviews = []
+
+            for reply in paper.get("all_replies", []):
+                content = reply.get("content", {})
+                review_id = reply.get("id", "unknown")
+
+                # Only process reviews that contain all required fields
+                if "summary" in content and "soundness" in content:
+                    try:
+                        review_data = {
+                            "review_id": review_id,
+                            "summary": content["summary"]["value"],
+                            "soundness": self.parse_score(content["soundness"]["value"]),
+                            "presentation": self.parse_score(content["presentation"]["value"]),
+                            "contribution": self.parse_score(content["contribution"]["value"]),
+                            "strengths": content["strengths"]["value"],
+                            "weaknesses": content["weaknesses"]["value"],
+                            "questions": content["questions"]["value"],
+                            "overall_rating": self.parse_score(content["rating"]["value"]),
+                            "confidence": self.parse_score(content["confidence"]["value"])
+                        }
+                        reviews.append(review_data)
+                    except Exception as e:
+                        print(f"Failed to parse review {review_id}: {e}")
+
+            if reviews:
+                yield {
+                    "paper_id": paper_id,
+                    "title": title,
+                    "reviews": reviews
+                }
+
 
 # ✅ Entry point
 if __name__ == "__main__":
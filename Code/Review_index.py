@@ -0,0 +1,230 @@
+import os
+import csv
+import json
+import time
+import argparse
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from Embedding_store import load_store, SECTION_SOURCE
+
+# hnswlib is optional; without it the index falls back to an inverted-file (IVF) index on numpy
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+ROOT_DIR = "../Data"
+categories = ["good", "borderline", "bad"]
+
+# HNSW parameters
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 128
+# IVF parameters: ~sqrt(N) lists, NPROBE of them scanned exactly per query
+IVF_NPROBE = 8
+IVF_TRAIN_SAMPLE = 100000
+
+
+def load_review_vectors(conf, year, store_name="embedding_store"):
+    """
+    Review-part vectors of every category store of one venue-year (section rows are skipped).
+    Returns (keys, vectors) with keys (category, paper_id, source, review_idx, part) and float16 vectors.
+    """
+    all_keys, chunks = [], []
+    for category in categories:
+        root = os.path.join(ROOT_DIR, conf, year, store_name, category)
+        if not os.path.exists(os.path.join(root, "meta.json")):
+            continue
+        keys, vectors = load_store(root)
+        rows = [row for row, key in enumerate(keys) if key[1] != SECTION_SOURCE]
+        if not rows:
+            continue
+        all_keys.extend((category, *keys[row]) for row in rows)
+        chunks.append(np.asarray(vectors[rows], dtype=np.float16))
+    if not chunks:
+        return [], np.zeros((0, 0), dtype=np.float16)
+    return all_keys, np.concatenate(chunks)
+
+
+class ReviewIndex:
+    """
+    Approximate nearest-neighbour index over normalized review-part embeddings (inner product = cosine).
+    method: "hnsw" (hnswlib), "ivf" (k-means inverted lists scanned with numpy) or "auto".
+    """
+
+    def __init__(self, keys, vectors, method="auto"):
+        if method == "auto":
+            method = "hnsw" if hnswlib is not None else "ivf"
+        if method == "hnsw" and hnswlib is None:
+            raise ImportError("hnswlib is not installed, use method='ivf'")
+        self.method = method
+        self.keys = list(keys)
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.vectors = vectors
+        self.hnsw = None
+        self.centroids = None
+        self.lists = None
+
+    # ===== Build =====
+    def build(self, batch_size=10000):
+        n, dim = self.vectors.shape
+        if self.method == "hnsw":
+            self.hnsw = hnswlib.Index(space="ip", dim=dim)
+            self.hnsw.init_index(max_elements=n, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+            for start in range(0, n, batch_size):
+                batch = np.asarray(self.vectors[start:start + batch_size], dtype=np.float32)
+                self.hnsw.add_items(batch, np.arange(start, start + len(batch)))
+            self.hnsw.set_ef(HNSW_EF_SEARCH)
+        else:
+            n_lists = max(1, int(np.sqrt(n)))
+            rng = np.random.default_rng(0)
+            sample = rng.choice(n, size=min(n, IVF_TRAIN_SAMPLE), replace=False)
+            kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=0, n_init=3)
+            kmeans.fit(np.asarray(self.vectors[np.sort(sample)], dtype=np.float32))
+            self.centroids = kmeans.cluster_centers_.astype(np.float32)
+            assignment = np.concatenate([
+                self.assign(np.asarray(self.vectors[start:start + batch_size], dtype=np.float32))
+                for start in range(0, n, batch_size)
+            ])
+            self.lists = [np.flatnonzero(assignment == c) for c in range(n_lists)]
+        return self
+
+    def assign(self, vectors):
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    # ===== Query =====
+    def search(self, vector, k, nprobe=IVF_NPROBE):
+        """Top-k (row, score) pairs for one normalized query vector; IVF scans the nprobe closest lists"""
+        k = min(k, len(self.keys))
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        if self.method == "hnsw":
+            self.hnsw.set_ef(max(HNSW_EF_SEARCH, k))
+            labels, distances = self.hnsw.knn_query(vector, k=k)
+            return [(int(row), 1.0 - float(dist)) for row, dist in zip(labels[0], distances[0])]
+
+        probes = np.argsort(-(vector @ self.centroids.T)[0])[:nprobe]
+        candidates = np.concatenate([self.lists[c] for c in probes])
+        scores = np.asarray(self.vectors[candidates], dtype=np.float32) @ vector[0]
+        top = np.argsort(-scores)[:k]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def query(self, vector, k=10, sources=None, parts=None, exclude_paper=None):
+        """
+        Top-k neighbours of a vector as [(key, score)], optionally restricted to some sources/parts.
+        Filtered queries over-fetch and widen the search (more results, and more IVF lists) until
+        k matches are found or the whole index has been scanned.
+        """
+        fetch = k
+        nprobe = IVF_NPROBE
+        n_lists = len(self.lists) if self.method == "ivf" else 0
+        while True:
+            hits = self.search(vector, fetch, nprobe)
+            matches = [
+                (self.keys[row], score) for row, score in hits
+                if (sources is None or self.keys[row][2] in sources)
+                and (parts is None or self.keys[row][4] in parts)
+                and self.keys[row][1] != exclude_paper
+            ]
+            if len(matches) >= k or (fetch >= len(self.keys) and nprobe >= n_lists):
+                return matches[:k]
+            fetch = min(len(self.keys), fetch * 4)
+            nprobe = min(n_lists, nprobe * 4) if n_lists else nprobe
+
+    def query_key(self, key, k=10, sources=None, same_part=True, exclude_own_paper=True):
+        """Neighbours of a stored review part, by default among the same part of other papers"""
+        return self.query(
+            self.vectors[self.rows[key]], k,
+            sources=sources,
+            parts=[key[4]] if same_part else None,
+            exclude_paper=key[1] if exclude_own_paper else None,
+        )
+
+    # ===== Persistence =====
+    def save(self, index_dir):
+        os.makedirs(index_dir, exist_ok=True)
+        with open(os.path.join(index_dir, "keys.tsv"), "w", newline="", encoding="utf-8") as f:
+            csv.writer(f, delimiter="\t").writerows(self.keys)
+        np.save(os.path.join(index_dir, "vectors.npy"), np.asarray(self.vectors, dtype=np.float16))
+        if self.method == "hnsw":
+            self.hnsw.save_index(os.path.join(index_dir, "hnsw.bin"))
+        else:
+            offsets = np.cumsum([0] + [len(l) for l in self.lists])
+            np.savez(os.path.join(index_dir, "ivf.npz"), centroids=self.centroids,
+                     rows=np.concatenate(self.lists), offsets=offsets)
+        with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"method": self.method, "count": len(self.keys), "dim": int(self.vectors.shape[1])}, f)
+
+    @classmethod
+    def load(cls, index_dir):
+        with open(os.path.join(index_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(index_dir, "keys.tsv"), "r", newline="", encoding="utf-8") as f:
+            keys = [(category, paper_id, source, int(review_idx), part)
+                    for category, paper_id, source, review_idx, part in csv.reader(f, delimiter="\t")]
+        vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+        index = cls(keys, vectors, method=meta["method"])
+        if index.method == "hnsw":
+            index.hnsw = hnswlib.Index(space="ip", dim=meta["dim"])
+            index.hnsw.load_index(os.path.join(index_dir, "hnsw.bin"), max_elements=meta["count"])
+            index.hnsw.set_ef(HNSW_EF_SEARCH)
+        else:
+            ivf = np.load(os.path.join(index_dir, "ivf.npz"))
+            index.centroids = ivf["centroids"]
+            rows, offsets = ivf["rows"], ivf["offsets"]
+            index.lists = [rows[offsets[c]:offsets[c + 1]] for c in range(len(index.centroids))]
+        return index
+
+
+def index_dir_for(conf, year, store_name="embedding_store"):
+    return os.path.join(ROOT_DIR, conf, year, f"review_index_{store_name}")
+
+
+def build_index(conf, year, store_name="embedding_store", method="auto"):
+    keys, vectors = load_review_vectors(conf, year, store_name)
+    if not keys:
+        print(f"No review vectors in {conf} {year} {store_name}, run Semantic_similarity.py first")
+        return None
+    start = time.time()
+    index = ReviewIndex(keys, vectors, method).build()
+    index.save(index_dir_for(conf, year, store_name))
+    print(f"Built {index.method} index over {len(keys)} review parts of {conf} {year} in {time.time() - start:.1f}s")
+    return index
+
+
+def print_neighbours(index, paper_id, source, targets, k):
+    """Nearest neighbours of every stored part of one paper's reviews from one source"""
+    own = [key for key in index.keys if key[1] == paper_id and key[2] == source]
+    if not own:
+        print(f"No {source} review parts stored for {paper_id}")
+        return
+    for key in own:
+        start = time.time()
+        hits = index.query_key(key, k, sources=targets)
+        print(f"\n{source} review {key[3]} / {key[4]} ({(time.time() - start) * 1000:.1f} ms)")
+        for (category, pid, src, review_idx, part), score in hits:
+            print(f"  {score:.4f}  {pid} [{category}] {src} review {review_idx}")
+
+
+# Usage:
+#   python Review_index.py build ICLR 2024
+#   python Review_index.py query ICLR 2024 <paper_id> --source gpt --target real -k 10
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ANN index over review-part embeddings")
+    parser.add_argument("command", choices=["build", "query"])
+    parser.add_argument("conf")
+    parser.add_argument("year")
+    parser.add_argument("paper_id", nargs="?")
+    parser.add_argument("--store", default="embedding_store", help="embedding store directory name")
+    parser.add_argument("--method", choices=["auto", "hnsw", "ivf"], default="auto")
+    parser.add_argument("--source", default="gpt", help="review source of the query parts")
+    parser.add_argument("--target", nargs="*", default=None, help="only return neighbours from these sources")
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(args.conf, args.year, args.store, args.method)
+    else:
+        if args.paper_id is None:
+            parser.error("query needs a paper_id")
+        print_neighbours(ReviewIndex.load(index_dir_for(args.conf, args.year, args.store)),
+                         args.paper_id, args.source, args.target, args.k)
@@ -1,11 +1,100 @@
 import os
 import json
+import importlib
+import time
+import random
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
 from tqdm import tqdm
+from Embedding_cache import EmbeddingCache, text_hash
+from Embedding_store import EmbeddingStore, SECTION_SOURCE, INDEX_FILE, read_index
 
-# Load BGE-M3 model
-model = SentenceTransformer("BAAI/bge-m3")
+# BGE-M3 model, loaded lazily on first encode (see get_model)
+MODEL_NAME = "BAAI/bge-m3"
+EMBEDDING_DIM = 1024
+model = None
+ENCODE_BATCH_SIZE = 32
+
+# Inference backends: "torch" (fp32), "int8" (dynamic quantization of the Linear layers, CPU),
+# "onnx" (ONNX Runtime through sentence-transformers' backend="onnx")
+BACKENDS = ["torch", "int8", "onnx"]
+backend = "torch"
+# Cache/store key of the current backend, so vectors from different backends never mix
+MODEL_KEY = MODEL_NAME
+
+def require_backend(name):
+    """Exit with an install hint when the packages of a backend are missing"""
+    try:
+        import torch
+        importlib.import_module("sentence_transformers")
+    except ImportError as e:
+        raise SystemExit(f"Embedding needs the {e.name} package: pip install torch sentence-transformers")
+    if name == "onnx":
+        try:
+            importlib.import_module("optimum.onnxruntime")  # also imports onnxruntime
+        except ImportError as e:
+            raise SystemExit(f'Backend onnx needs the {e.name} package: pip install "optimum[onnxruntime]"')
+    if name == "int8" and not set(torch.backends.quantized.supported_engines) & {"fbgemm", "x86", "qnnpack"}:
+        raise SystemExit("Backend int8 needs a torch build with a quantized CPU engine (fbgemm, x86 or qnnpack)")
+
+# torch and sentence_transformers are imported where they are used, so --help, --dry-run and
+# fully cached runs start without loading them
+def load_model(name):
+    require_backend(name)
+    import torch
+    from sentence_transformers import SentenceTransformer
+    if name == "torch":
+        return SentenceTransformer(MODEL_NAME)
+    if name == "int8":
+        fp32 = SentenceTransformer(MODEL_NAME, device="cpu")
+        return torch.quantization.quantize_dynamic(fp32, {torch.nn.Linear}, dtype=torch.qint8)
+    if name == "onnx":
+        return SentenceTransformer(MODEL_NAME, backend="onnx")
+    raise ValueError(f"Unknown backend: {name}")
+
+def get_model():
+    """Load the model for the current backend on first use"""
+    global model
+    if model is None:
+        print(f"Loading {MODEL_NAME} ({backend})...")
+        model = load_model(backend)
+    return model
+
+def set_backend(name):
+    """Switch to another inference backend; the model is reloaded lazily"""
+    global model, backend, MODEL_KEY
+    if name != backend:
+        model = None
+        backend = name
+    MODEL_KEY = MODEL_NAME if name == "torch" else f"{MODEL_NAME}@{name}"
+
+# Chunked section encoding, off by default (see set_chunking): sections are split into windows of
+# at most CHUNK_TOKENS tokens overlapping by CHUNK_OVERLAP, encoded in one batch across papers and
+# pooled into one vector per section
+POOLINGS = ["mean", "max"]
+CHUNK_TOKENS = None
+CHUNK_OVERLAP = 32
+CHUNK_POOLING = "mean"
+
+def set_chunking(max_tokens=None, overlap=32, pooling="mean"):
+    """Enable chunked section encoding with max_tokens-token windows; None encodes whole sections"""
+    global CHUNK_TOKENS, CHUNK_OVERLAP, CHUNK_POOLING
+    if pooling not in POOLINGS:
+        raise ValueError(f"Unknown pooling: {pooling}")
+    if max_tokens is not None and not 0 <= overlap < max_tokens - 2:
+        raise ValueError(f"Overlap {overlap} does not fit in {max_tokens}-token windows")
+    CHUNK_TOKENS, CHUNK_OVERLAP, CHUNK_POOLING = max_tokens, overlap, pooling
+
+def chunk_config():
+    return CHUNK_TOKENS, CHUNK_OVERLAP, CHUNK_POOLING
+
+def section_model_key():
+    """Cache key of section vectors, so chunked and whole-section vectors never mix"""
+    if CHUNK_TOKENS is None:
+        return MODEL_KEY
+    return f"{MODEL_KEY}#chunk{CHUNK_TOKENS}-{CHUNK_OVERLAP}-{CHUNK_POOLING}"
 
 # Configuration
 ROOT_DIR = "../Data"
@@ -25,81 +114,359 @@ def save_json(data, path):
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
 
-def encode_sections(section_file):
-    """Encode each mapped section of a paper"""
-    sections = load_json(section_file)
-    section_texts = {sec["mapped_section"]: sec["content"] for sec in sections}
-    section_embeddings = {
-        sec: model.encode(text, convert_to_tensor=True)
-        for sec, text in section_texts.items()
-    }
+def split_into_windows(text):
+    """
+    Split text into windows of at most CHUNK_TOKENS tokens (including <s> and </s>), sliced from
+    the original string with the tokenizer's offsets. Short texts come back as a single window.
+    """
+    window = min(CHUNK_TOKENS, get_model().max_seq_length) - 2
+    offsets = get_model().tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    if len(offsets) <= window:
+        return [text]
+    step = max(1, window - CHUNK_OVERLAP)
+    windows = []
+    for start in range(0, len(offsets), step):
+        end = min(start + window, len(offsets))
+        windows.append(text[offsets[start][0]:offsets[end - 1][1]])
+        if end == len(offsets):
+            break
+    return windows
+
+def pool_windows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors.max(axis=0) if CHUNK_POOLING == "max" else vectors.mean(axis=0)
+
+def encode_chunked(keyed_texts):
+    """
+    {key: text} -> ({key: pooled vector}, {key: chunk count}).
+    The windows of all texts are sorted by length and encoded in one call, so batches are filled
+    with similarly sized windows instead of being padded to the longest section.
+    """
+    owners, windows = [], []
+    for key, text in keyed_texts.items():
+        for chunk in split_into_windows(text):
+            owners.append(key)
+            windows.append(chunk)
+
+    order = sorted(range(len(windows)), key=lambda i: len(windows[i]))
+    encoded = get_model().encode([windows[i] for i in order], batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True)
+    by_key = {}
+    for i, vec in zip(order, encoded):
+        by_key.setdefault(owners[i], []).append(vec)
+    return {key: pool_windows(vecs) for key, vecs in by_key.items()}, {key: len(vecs) for key, vecs in by_key.items()}
+
+def encode_sections_batch(section_files, cache=None, chunk_counts=None):
+    """
+    Encode the mapped sections of many papers at once.
+    section_files: {paper_id: section_file}. Texts missing from the cache are sorted by length and
+    sent to the model in a single encode call; returns {paper_id: {section: embedding tensor}}.
+    chunk_counts: optional dict filled with {paper_id: {section: windows}} in chunked mode.
+    """
+    key_model = section_model_key()
+    keyed_texts = {}
+    for paper_id, section_file in section_files.items():
+        for sec in load_json(section_file):
+            text = sec["content"]
+            keyed_texts[(paper_id, sec["mapped_section"], text_hash(text), key_model)] = text
+
+    vectors = cache.get_many(keyed_texts) if cache is not None else {}
+    missing = sorted((k for k in keyed_texts if k not in vectors), key=lambda k: len(keyed_texts[k]))
+    counts = {}
+    if missing:
+        if CHUNK_TOKENS is None:
+            encoded = get_model().encode([keyed_texts[k] for k in missing], batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True)
+            new_vectors = dict(zip(missing, encoded))
+        else:
+            new_vectors, counts = encode_chunked({k: keyed_texts[k] for k in missing})
+        if cache is not None:
+            cache.put_many(new_vectors.items())
+            if counts:
+                cache.put_chunk_counts(counts.items())
+        vectors.update(new_vectors)
+
+    if chunk_counts is not None and CHUNK_TOKENS is not None:
+        if cache is not None:
+            counts.update(cache.get_chunk_counts([k for k in keyed_texts if k not in counts]))
+        for key, n in counts.items():
+            chunk_counts.setdefault(key[0], {})[key[1]] = n
+
+    import torch
+    section_embeddings = {paper_id: {} for paper_id in section_files}
+    for key in keyed_texts:
+        paper_id, section = key[0], key[1]
+        section_embeddings[paper_id][section] = torch.from_numpy(np.array(vectors[key], dtype=np.float32))
     return section_embeddings
 
+def encode_sections(section_file, paper_id=None, cache=None):
+    """Encode each mapped section of a paper"""
+    paper_id = paper_id or os.path.basename(section_file).replace("_section.json", "")
+    return encode_sections_batch({paper_id: section_file}, cache)[paper_id]
+
+def extract_review_parts(review, review_source):
+    """Non-empty text of each review part, in output order"""
+    if review_source == "real":
+        review_parts = {
+            "summary": review.get("summary", ""),
+            "strengths": review.get("strengths", ""),
+            "weaknesses": review.get("weaknesses", ""),
+            "questions": review.get("questions", "")
+        }
+    else:  # LLM reviews
+        review_parts = {
+            "summary": review.get("summary", ""),
+            "strengths": review.get("strengths", ""),
+            "weaknesses": review.get("weaknesses", ""),
+            "questions": " ".join(review.get("questions", [])),  # questions is a list
+            "reasons_for_overall_rating": review.get("Reasons for overall_rating", review.get("Reasons for overal_rating", ""))
+        }
+
+    parts = {}
+    for part_name, part_text in review_parts.items():
+        if isinstance(part_text, list):
+            part_text = " ".join(part_text)
+
+        if isinstance(part_text, str) and part_text.strip():
+            parts[part_name] = part_text
+    return parts
+
+def rank_sections(section_names, scores):
+    """Sort one row of part-vs-section scores into [(section, score)], highest first"""
+    sorted_similarities = sorted(zip(section_names, scores), key=lambda x: x[1], reverse=True)
+    return [(sec, round(score, 4)) for sec, score in sorted_similarities]
+
+def section_matrix(section_embeddings):
+    """Stack and L2-normalize section embeddings once per paper"""
+    import torch
+    section_names = list(section_embeddings.keys())
+    matrix = torch.stack([section_embeddings[sec] for sec in section_names])
+    return section_names, torch.nn.functional.normalize(matrix, dim=1)
+
 def compute_similarity(part_text, section_embeddings):
     """Compute similarity between a review part and each section"""
     if not part_text.strip():
         return {}
-    part_embedding = model.encode(part_text, convert_to_tensor=True)
-    similarities = {
-        section: util.pytorch_cos_sim(part_embedding, embedding).item()
-        for section, embedding in section_embeddings.items()
+    section_names, sections = section_matrix(section_embeddings)
+    part_embedding = get_model().encode([part_text], convert_to_tensor=True, normalize_embeddings=True)
+    scores = (part_embedding @ sections.to(part_embedding.device).T)[0].tolist()
+    return rank_sections(section_names, scores)
+
+def process_paper_reviews(paper_id, section_embeddings, reviews_by_source, store=None):
+    """
+    Similarity results for all review sources of one paper.
+    reviews_by_source: {source: (reviews, review_source)}. Every review part of every source is
+    encoded in one batch and scored against all sections with a single matmul.
+    store: optional EmbeddingStore that keeps the normalized part and section vectors.
+    Returns {source: {"paper_id": ..., "reviews": [{part: [(section, score), ...]}]}}.
+    """
+    layout = []  # (source, review_idx, part_name)
+    texts = []
+    for source, (reviews, review_source) in reviews_by_source.items():
+        for review_idx, review in enumerate(reviews):
+            for part_name, part_text in extract_review_parts(review, review_source).items():
+                layout.append((source, review_idx, part_name))
+                texts.append(part_text)
+
+    results = {
+        source: {"paper_id": paper_id, "reviews": [{} for _ in reviews]}
+        for source, (reviews, _) in reviews_by_source.items()
     }
-    sorted_similarities = sorted(similarities.items(), key=lambda x: x[1], reverse=True)
-    return [(sec, round(score, 4)) for sec, score in sorted_similarities]
+    if not texts:
+        return results
+    if not section_embeddings:
+        for source, review_idx, part_name in layout:
+            results[source]["reviews"][review_idx][part_name] = []
+        return results
+
+    section_names, sections = section_matrix(section_embeddings)
+    parts = get_model().encode(texts, batch_size=ENCODE_BATCH_SIZE, convert_to_tensor=True, normalize_embeddings=True)
+    scores = (parts @ sections.to(parts.device).T).cpu().tolist()
+
+    if store is not None:
+        store.append([(paper_id, SECTION_SOURCE, -1, sec) for sec in section_names], sections.cpu().numpy())
+        store.append([(paper_id, source, review_idx, part_name) for source, review_idx, part_name in layout], parts.cpu().numpy())
+
+    for (source, review_idx, part_name), row in zip(layout, scores):
+        results[source]["reviews"][review_idx][part_name] = rank_sections(section_names, row)
+    return results
 
 def process_reviews(paper_id, section_embeddings, reviews, review_source):
     """Process all reviews for a given paper"""
-    similarity_reviews = {"paper_id": paper_id, "reviews": []}
-
-    for review in reviews:
-        if review_source == "real":
-            review_parts = {
-                "summary": review.get("summary", ""),
-                "strengths": review.get("strengths", ""),
-                "weaknesses": review.get("weaknesses", ""),
-                "questions": review.get("questions", "")
-            }
-        else:  # LLM reviews
-            review_parts = {
-                "summary": review.get("summary", ""),
-                "strengths": review.get("strengths", ""),
-                "weaknesses": review.get("weaknesses", ""),
-                "questions": " ".join(review.get("questions", [])),  # questions is a list
-                "reasons_for_overall_rating": review.get("Reasons for overall_rating", review.get("Reasons for overal_rating", ""))
-            }
-
-        similarity_data = {}
-        for part_name, part_text in review_parts.items():
-            if isinstance(part_text, list):
-                part_text = " ".join(part_text)
-
-            if isinstance(part_text, str) and part_text.strip():
-                similarity_data[part_name] = compute_similarity(part_text, section_embeddings)
-
-        similarity_reviews["reviews"].append(similarity_data)
-
-    return similarity_reviews
-
-def main():
+    return process_paper_reviews(paper_id, section_embeddings, {review_source: (reviews, review_source)})[review_source]
+
+def load_real_reviews(path):
+    if not os.path.exists(path):
+        return {}
+    return {entry["paper_id"]: entry["reviews"] for entry in load_json(path)}
+
+def chunk_suffix():
+    """Directory suffix of the section chunking setup (window, overlap and pooling); empty for whole sections"""
+    if CHUNK_TOKENS is None:
+        return ""
+    return f"_chunk{CHUNK_TOKENS}-{CHUNK_OVERLAP}_{CHUNK_POOLING}"
+
+def mode_suffix():
+    """Directory suffix of the inference backend and section chunking setup; empty for fp32 whole sections"""
+    return ("" if backend == "torch" else f"_{backend}") + chunk_suffix()
+
+def store_dir_name():
+    """One embedding store per backend and section chunking setup"""
+    return "embedding_store" + mode_suffix()
+
+def results_dir_name():
+    """Similarity results per backend and chunking setup, so results of another mode never count as done"""
+    return "similarity_results" + mode_suffix()
+
+def category_paths(conf, year, category):
+    """Input and output locations for one conference/year/category"""
+    return {
+        "section_map_dir": os.path.join(ROOT_DIR, conf, year, "md_section_paper", category),
+        "real_review_file": os.path.join(ROOT_DIR, conf, year, "real_review", f"{category}_papers", f"{category}_reviews.json"),
+        "real_output_dir": os.path.join(ROOT_DIR, conf, year, results_dir_name(), "real_review", category),
+        "store_dir": os.path.join(ROOT_DIR, conf, year, store_dir_name(), category),
+        "llm_review_dirs": {
+            model_name: os.path.join(ROOT_DIR, conf, year, f"{model_name}_review", f"{category}_papers")
+            for model_name in llm_models
+        },
+        "llm_output_dirs": {
+            model_name: os.path.join(ROOT_DIR, conf, year, results_dir_name(), f"{model_name}_review", category)
+            for model_name in llm_models
+        },
+    }
+
+def collect_sources(paths, paper_id, real_reviews_by_id, include_done=False, sources=None):
+    """
+    Reviews to score for one paper: ({source: (reviews, review_source)}, {source: output_path}).
+    sources: pending sources from the planner; when given, no per-file existence checks are made.
+    """
+    reviews_by_source = {}
+    output_paths = {}
+
+    # === Real reviews ===
+    real_output_path = os.path.join(paths["real_output_dir"], f"{paper_id}.json")
+    if sources is not None:
+        wanted = "real" in sources
+    else:
+        wanted = include_done or not os.path.exists(real_output_path)
+    if wanted and paper_id in real_reviews_by_id:
+        reviews_by_source["real"] = (real_reviews_by_id[paper_id], "real")
+        output_paths["real"] = real_output_path
+
+    # === LLM reviews ===
+    for model_name in llm_models:
+        llm_review_dir = paths["llm_review_dirs"][model_name]
+        llm_output_dir = paths["llm_output_dirs"][model_name]
+        review_path = os.path.join(llm_review_dir, f"{paper_id}.json")
+        llm_output_path = os.path.join(llm_output_dir, f"{paper_id}.json")
+
+        if sources is not None:
+            wanted = model_name in sources
+        else:
+            wanted = (include_done or not os.path.exists(llm_output_path)) and os.path.exists(review_path)
+        if wanted:
+            llm_reviews_data = load_json(review_path)
+            reviews_by_source[model_name] = (llm_reviews_data.get("reviews", []), "llm")
+            output_paths[model_name] = llm_output_path
+
+    return reviews_by_source, output_paths
+
+def process_papers(paths, paper_files, jobs, real_reviews_by_id, cache, store, desc=None):
+    """
+    Encode sections and write similarity results for the given {paper_id: section_file}.
+    jobs: {paper_id: [pending sources]} from plan_jobs
+    """
+    chunk_counts = {}
+    all_section_embeddings = encode_sections_batch(paper_files, cache, chunk_counts)
+
+    for paper_id in tqdm(paper_files, desc=desc, ncols=100, disable=desc is None):
+
+        section_embeddings = all_section_embeddings[paper_id]
+
+        reviews_by_source, output_paths = collect_sources(paths, paper_id, real_reviews_by_id, sources=jobs[paper_id])
+
+        if not reviews_by_source:
+            continue
+        results = process_paper_reviews(paper_id, section_embeddings, reviews_by_source, store)
+        for source, similarity_reviews in results.items():
+            if CHUNK_TOKENS is not None:
+                similarity_reviews["section_chunks"] = chunk_counts.get(paper_id, {})
+            save_json(similarity_reviews, output_paths[source])
+
+    return len(paper_files)
+
+# ===== CPU process pool =====
+class VectorBuffer:
+    """Collects store appends inside a worker so the parent process owns the EmbeddingStore files"""
+
+    def __init__(self):
+        self.items = []
+
+    def append(self, keys, vectors):
+        self.items.append((list(keys), vectors))
+
+_worker_cache = None
+
+def init_cpu_worker(threads, backend_name="torch", chunking=(None, 32, "mean")):
+    """Limit intra-op threads so workers x threads does not oversubscribe the cores"""
+    global _worker_cache
+    import torch
+    torch.set_num_threads(threads)
+    set_backend(backend_name)
+    set_chunking(*chunking)
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    _worker_cache = EmbeddingCache()
+
+def process_shard(paths, paper_files, jobs, real_reviews_by_id):
+    buffer = VectorBuffer()
+    count = process_papers(paths, paper_files, jobs, real_reviews_by_id, _worker_cache, buffer)
+    return count, buffer.items
+
+def process_category_pool(pool, paths, paper_files, jobs, real_reviews_by_id, store, workers, desc):
+    """Shard the papers of one category across the pool and merge their vectors into the store"""
+    paper_ids = list(paper_files)
+    n_shards = min(len(paper_ids), workers * 4)
+    shards = [paper_ids[k::n_shards] for k in range(n_shards)]
+    futures = [
+        pool.submit(
+            process_shard, paths,
+            {pid: paper_files[pid] for pid in shard},
+            {pid: jobs[pid] for pid in shard},
+            {pid: real_reviews_by_id[pid] for pid in shard if pid in real_reviews_by_id},
+        )
+        for shard in shards
+    ]
+    processed = 0
+    for future in tqdm(as_completed(futures), total=len(futures), desc=desc, ncols=100):
+        count, items = future.result()
+        processed += count
+        for keys, vectors in items:
+            store.append(keys, vectors)
+    return processed
+
+def list_json_ids(directory):
+    """Paper ids with a <paper_id>.json in directory, from one listing instead of per-file probes"""
+    if not os.path.isdir(directory):
+        return set()
+    return {f[:-len(".json")] for f in os.listdir(directory) if f.endswith(".json")}
+
+def stored_sources(store_dir):
+    """(paper_id, source) pairs with review-part vectors in the store of one category"""
+    return {(key[0], key[1]) for key in read_index(os.path.join(store_dir, INDEX_FILE)) if key[1] != SECTION_SOURCE}
+
+def plan_jobs(backfill=False):
+    """
+    Every pending (conf, year, category, paper_id, source) job, built from one listing per directory.
+    backfill: a job is pending when the embedding store has no vectors for it, even if its result
+    file exists, so stores (and the review index built on them) cover results computed earlier.
+    Returns one group per conference/year/category with at least one pending job:
+    {"conf", "year", "category", "paths", "paper_files": {paper_id: section_file},
+     "jobs": {paper_id: [sources]}, "real_reviews_by_id"}
+    """
+    plan = []
     for conf, years in conferences_years.items():
         for year in years:
-            print(f"\n Processing {conf} {year}...")
             for category in categories:
-                print(f" Category: {category}")
-
-                # Define paths
-                section_map_dir = os.path.join(ROOT_DIR, conf, year, "md_section_paper", category)
-                real_review_file = os.path.join(ROOT_DIR, conf, year, "real_review", f"{category}_papers", f"{category}_reviews.json")
-                real_output_dir = os.path.join(ROOT_DIR, conf, year, "similarity_results", "real_review", category)
-
-                llm_review_dirs = {
-                    model_name: os.path.join(ROOT_DIR, conf, year, f"{model_name}_review", f"{category}_papers")
-                    for model_name in llm_models
-                }
-                llm_output_dirs = {
-                    model_name: os.path.join(ROOT_DIR, conf, year, "similarity_results", f"{model_name}_review", category)
-                    for model_name in llm_models
-                }
+                paths = category_paths(conf, year, category)
+                section_map_dir = paths["section_map_dir"]
 
                 if not os.path.exists(section_map_dir):
                     continue  # Skip if section directory does not exist
@@ -110,40 +477,197 @@ def main():
                 }
 
                 # Load real reviews
-                real_reviews_data = []
-                if os.path.exists(real_review_file):
-                    real_reviews_data = load_json(real_review_file)
-                    real_reviews_by_id = {entry["paper_id"]: entry["reviews"] for entry in real_reviews_data}
+                real_reviews_by_id = load_real_reviews(paths["real_review_file"])
+
+                llm_available = {m: list_json_ids(paths["llm_review_dirs"][m]) for m in llm_models}
+                if backfill:
+                    stored = stored_sources(paths["store_dir"])
+                    real_done = {pid for pid, source in stored if source == "real"}
+                    llm_done = {m: {pid for pid, source in stored if source == m} for m in llm_models}
                 else:
-                    real_reviews_by_id = {}
+                    real_done = list_json_ids(paths["real_output_dir"])
+                    llm_done = {m: list_json_ids(paths["llm_output_dirs"][m]) for m in llm_models}
+
+                jobs = {}
+                for paper_id in paper_files:
+                    sources = []
+                    if paper_id in real_reviews_by_id and paper_id not in real_done:
+                        sources.append("real")
+                    sources.extend(
+                        m for m in llm_models
+                        if paper_id in llm_available[m] and paper_id not in llm_done[m]
+                    )
+                    if sources:
+                        jobs[paper_id] = sources
+
+                if jobs:
+                    plan.append({
+                        "conf": conf,
+                        "year": year,
+                        "category": category,
+                        "paths": paths,
+                        "paper_files": {paper_id: paper_files[paper_id] for paper_id in jobs},
+                        "jobs": jobs,
+                        "real_reviews_by_id": real_reviews_by_id,
+                    })
+    return plan
+
+def print_plan(plan):
+    """Dry-run summary: pending papers and jobs per source for each group"""
+    total_papers, total_jobs = 0, 0
+    for group in plan:
+        per_source = {}
+        for sources in group["jobs"].values():
+            for source in sources:
+                per_source[source] = per_source.get(source, 0) + 1
+        n_jobs = sum(per_source.values())
+        total_papers += len(group["jobs"])
+        total_jobs += n_jobs
+        detail = ", ".join(f"{source}: {n}" for source, n in per_source.items())
+        print(f"  {group['conf']} {group['year']} {group['category']:<10} {len(group['jobs']):>5} papers, {n_jobs:>5} jobs ({detail})")
+    print(f"Pending: {total_papers} papers, {total_jobs} (paper, source) jobs in {len(plan)} groups")
+
+def main(workers=1, threads_per_worker=None, dry_run=False, backfill=False):
+    """
+    workers > 1 runs the CPU mode: papers are sharded across a spawn-based process pool, each worker
+    with its own model copy and threads_per_worker intra-op threads (default: cores // workers).
+    Pending work is planned first; the model is only loaded when some paper still needs results.
+    dry_run: print the plan and exit.
+    backfill: plan from vectors missing in the embedding store instead of missing result files.
+    """
+    plan = plan_jobs(backfill)
+    print_plan(plan)
+    if dry_run:
+        return
+    if not plan:
+        print("All similarity results are up to date, nothing to encode.")
+        return
+    require_backend(backend)
 
-                paper_ids = list(paper_files.keys())
+    cache = EmbeddingCache()
+    pool = None
+    if workers > 1:
+        threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        print(f"CPU pool: {workers} workers x {threads_per_worker} threads")
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_cpu_worker,
+            initargs=(threads_per_worker, backend, chunk_config()),
+        )
 
-                for paper_id in tqdm(paper_ids, desc=f"{conf}-{year}-{category}", ncols=100):
+    total_papers = 0
+    start = time.time()
+    for group in plan:
+        paths, paper_files, jobs, real_reviews_by_id = group["paths"], group["paper_files"], group["jobs"], group["real_reviews_by_id"]
+        desc = f"{group['conf']}-{group['year']}-{group['category']}"
+        print(f"\n Processing {desc}...")
+        store = EmbeddingStore(paths["store_dir"], dim=EMBEDDING_DIM, model_name=MODEL_KEY)
+        category_start = time.time()
+        if pool is None:
+            processed = process_papers(paths, paper_files, jobs, real_reviews_by_id, cache, store, desc=desc)
+        else:
+            processed = process_category_pool(pool, paths, paper_files, jobs, real_reviews_by_id, store, workers, desc)
+        elapsed = time.time() - category_start
+        total_papers += processed
+        print(f" {processed} papers in {elapsed:.1f}s ({processed / max(elapsed, 1e-9):.2f} papers/sec)")
 
-                    section_file = paper_files[paper_id]
-                    section_embeddings = encode_sections(section_file)
+    if pool is not None:
+        pool.shutdown()
+    elapsed = time.time() - start
+    print(f"\n Total: {total_papers} papers in {elapsed:.1f}s ({total_papers / max(elapsed, 1e-9):.2f} papers/sec)")
 
-                    # === Process real reviews ===
-                    real_output_path = os.path.join(real_output_dir, f"{paper_id}.json")
-                    if not os.path.exists(real_output_path) and paper_id in real_reviews_by_id:
-                        reviews = real_reviews_by_id[paper_id]
-                        similarity_reviews = process_reviews(paper_id, section_embeddings, reviews, review_source="real")
-                        save_json(similarity_reviews, real_output_path)
+# ===== Backend parity check =====
+def sample_papers(sample_size, seed=0):
+    """Random sample of (paper_id, section_file, reviews_by_source) across all venues and categories"""
+    candidates = []
+    for conf, years in conferences_years.items():
+        for year in years:
+            for category in categories:
+                paths = category_paths(conf, year, category)
+                if not os.path.exists(paths["section_map_dir"]):
+                    continue
+                real_reviews_by_id = load_real_reviews(paths["real_review_file"])
+                for f in sorted(os.listdir(paths["section_map_dir"])):
+                    if f.endswith("_section.json"):
+                        candidates.append((paths, f.replace("_section.json", ""), os.path.join(paths["section_map_dir"], f), real_reviews_by_id))
+
+    sample = random.Random(seed).sample(candidates, min(sample_size, len(candidates)))
+    papers = []
+    for paths, paper_id, section_file, real_reviews_by_id in sample:
+        reviews_by_source, _ = collect_sources(paths, paper_id, real_reviews_by_id, include_done=True)
+        if reviews_by_source:
+            papers.append((paper_id, section_file, reviews_by_source))
+    return papers
+
+def score_papers(papers):
+    """{(paper_id, source, review_idx, part, section): score} with no caching, plus elapsed seconds"""
+    scores = {}
+    start = time.time()
+    for paper_id, section_file, reviews_by_source in papers:
+        section_embeddings = encode_sections(section_file, paper_id)
+        results = process_paper_reviews(paper_id, section_embeddings, reviews_by_source)
+        for source, result in results.items():
+            for review_idx, review in enumerate(result["reviews"]):
+                for part, ranked in review.items():
+                    for section, score in ranked:
+                        scores[(paper_id, source, review_idx, part, section)] = score
+    return scores, time.time() - start
 
-                    # === Process LLM reviews ===
-                    for model_name in llm_models:
-                        llm_review_dir = llm_review_dirs[model_name]
-                        llm_output_dir = llm_output_dirs[model_name]
-                        review_path = os.path.join(llm_review_dir, f"{paper_id}.json")
-                        llm_output_path = os.path.join(llm_output_dir, f"{paper_id}.json")
+def parity_check(backend_name, sample_size=20, seed=0):
+    """Compare an alternative backend against fp32 scores on a sample of papers"""
+    require_backend(backend_name)
+    papers = sample_papers(sample_size, seed)
+    if not papers:
+        print("No papers with reviews found for the parity check")
+        return None
 
-                        if not os.path.exists(llm_output_path) and os.path.exists(review_path):
-                            llm_reviews_data = load_json(review_path)
-                            reviews = llm_reviews_data.get("reviews", [])
-                            similarity_reviews = process_reviews(paper_id, section_embeddings, reviews, review_source="llm")
-                            save_json(similarity_reviews, llm_output_path)
+    set_backend("torch")
+    reference, reference_time = score_papers(papers)
+    set_backend(backend_name)
+    candidate, candidate_time = score_papers(papers)
+
+    deviations = [abs(candidate[key] - score) for key, score in reference.items() if key in candidate]
+    max_dev = max(deviations, default=0.0)
+
+    def top_sections(scores):
+        best = {}
+        for (paper_id, source, review_idx, part, section), score in scores.items():
+            key = (paper_id, source, review_idx, part)
+            if key not in best or score > best[key][1]:
+                best[key] = (section, score)
+        return {key: section for key, (section, _) in best.items()}
+
+    ref_top, cand_top = top_sections(reference), top_sections(candidate)
+    top1 = sum(ref_top[k] == cand_top.get(k) for k in ref_top) / max(1, len(ref_top))
+
+    print(f"Parity {backend_name} vs fp32 on {len(papers)} papers ({len(deviations)} scores):")
+    print(f"  max |score deviation|: {max_dev:.4f}, mean: {np.mean(deviations) if deviations else 0.0:.4f}")
+    print(f"  top-1 section agreement: {top1:.1%}")
+    print(f"  time fp32 {reference_time:.1f}s, {backend_name} {candidate_time:.1f}s "
+          f"(speedup {reference_time / max(candidate_time, 1e-9):.2f}x)")
+    return max_dev
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Review/section semantic similarity with BGE-M3")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch", help="embedding inference backend")
+    parser.add_argument("--workers", type=int, default=1, help="CPU worker processes (GPU-less machines)")
+    parser.add_argument("--threads", type=int, default=None, help="torch threads per worker")
+    parser.add_argument("--chunk-tokens", type=int, default=None, metavar="N",
+                        help="split sections into N-token windows and pool them (default: whole sections)")
+    parser.add_argument("--chunk-overlap", type=int, default=32, help="tokens shared by consecutive windows")
+    parser.add_argument("--pooling", choices=POOLINGS, default="mean", help="how window vectors are pooled")
+    parser.add_argument("--dry-run", action="store_true", help="print the pending job plan and exit")
+    parser.add_argument("--backfill-store", action="store_true",
+                        help="also score papers whose results exist but whose vectors are missing from the store")
+    parser.add_argument("--parity", type=int, default=0, metavar="N",
+                        help="only compare --backend against fp32 scores on N sampled papers")
+    args = parser.parse_args()
+
+    set_chunking(args.chunk_tokens, args.chunk_overlap, args.pooling)
+    if args.parity:
+        parity_check(args.backend, args.parity)
+        raise SystemExit
+    set_backend(args.backend)
+    main(workers=args.workers, threads_per_worker=args.threads, dry_run=args.dry_run, backfill=args.backfill_store)
     print("\n All similarity analysis completed!")
@@ -0,0 +1,49 @@
+import numpy as np
+from Embedding_store import EmbeddingStore, load_store, SECTION_SOURCE
+
+
+def normalized(rows, dim, seed):
+    vectors = np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_two_papers_round_trip(tmp_path):
+    dim = 8
+    store = EmbeddingStore(str(tmp_path), dim=dim, model_name="test")
+    written = {}
+    for seed, paper_id in enumerate(["paperA", "paperB"]):
+        keys = [(paper_id, SECTION_SOURCE, -1, "method"),
+                (paper_id, "real", 0, "summary"),
+                (paper_id, "gpt", 1, "weaknesses")]
+        vectors = normalized(len(keys), dim, seed)
+        assert store.append(keys, vectors) == len(keys)
+        written.update(zip(keys, vectors))
+
+    # Reopening reads the index back and keeps every row
+    reopened = EmbeddingStore(str(tmp_path), dim=dim)
+    assert len(reopened) == 6
+    assert reopened.append(list(written)[:1], normalized(1, dim, 9)) == 0
+
+    keys, vectors = load_store(str(tmp_path))
+    assert keys == list(written)
+    for key, vector in zip(keys, vectors):
+        np.testing.assert_allclose(np.asarray(vector, dtype=np.float32), written[key], atol=1e-3)
+
+
+def test_remove_rewrites_remaining_rows(tmp_path):
+    dim = 8
+    store = EmbeddingStore(str(tmp_path), dim=dim)
+    keys = [("paperA", "gpt", 0, "summary"), ("paperB", "gpt", 0, "summary"),
+            ("paperB", "real", 0, "summary"), ("paperC", "gpt", 1, "questions")]
+    vectors = normalized(len(keys), dim, 3)
+    store.append(keys, vectors)
+
+    assert store.remove(lambda key: key[0] == "paperB" and key[1] == "gpt") == 1
+    assert ("paperB", "gpt", 0, "summary") not in store
+    stored, stored_vectors = load_store(str(tmp_path))
+    assert stored == [keys[0], keys[2], keys[3]]
+    np.testing.assert_allclose(np.asarray(stored_vectors, dtype=np.float32), vectors[[0, 2, 3]], atol=1e-3)
+
+    # The removed key can be written again and lands at the end
+    assert EmbeddingStore(str(tmp_path), dim=dim).append(keys[1:2], vectors[1:2]) == 1
+    assert load_store(str(tmp_path))[0][-1] == keys[1]
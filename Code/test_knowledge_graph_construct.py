@@ -0,0 +1,108 @@
+import os
+import json
+import random
+import pytest
+import Knowledge_graph_construct as kg
+
+SOURCES = ["gpt", "llama", "real"]
+LABELS = ["Method", "Task", "Metric", "Material", "OtherScientificTerm", "Generic"]
+RELATIONS = ["USED-FOR", "COMPARE", "CONJUNCTION", "PART-OF", "FEATURE-OF", "HYPONYM-OF", "EVALUATE-FOR"]
+SECTIONS = ["summary", "strengths", "weaknesses", "questions"]
+
+
+def synthetic_example(rng, doc_key, empty=False):
+    """One PL-Marker prediction line with random entities, relations, self-loops and repeated edges"""
+    sentences = [["N/A"]] if empty else [
+        [f"w{rng.randint(0, 50)}" for _ in range(rng.randint(3, 15))] for _ in range(rng.randint(1, 3))
+    ]
+    ner, re_, offset = [], [], 0
+    for sentence in sentences:
+        spans = []
+        for _ in range(rng.randint(0, 4)):
+            start = offset + rng.randint(0, len(sentence) - 1)
+            spans.append([start, min(offset + len(sentence) - 1, start + rng.randint(0, 2)), rng.choice(LABELS)])
+        relations = []
+        for _ in range(rng.randint(0, 3)):
+            if len(spans) >= 2:
+                head, tail = rng.sample(spans, 2)
+                relations.append([head[:2], tail[:2], rng.choice(RELATIONS)])
+            if spans and rng.random() < 0.1:
+                relations.append([spans[0][:2], spans[0][:2], "COMPARE"])
+        ner.append(spans)
+        re_.append([len(re_), relations])
+        offset += len(sentence)
+    return {"doc_key": doc_key, "sentences": sentences, "predicted_ner": ner, "predicted_re": re_}
+
+
+@pytest.fixture
+def cell(tmp_path):
+    """Input files of one (ICLR, 2024, good) cell; real reviews have some empty question sections"""
+    rng = random.Random(0)
+    base_dir = str(tmp_path / "kg") + os.sep
+    for source in SOURCES:
+        path = kg.source_path(base_dir, source, "ICLR", "2024", "good")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for paper in range(12):
+                for review in range(rng.randint(1, 3)):
+                    for section in SECTIONS:
+                        empty = source == "real" and section == "questions" and rng.random() < 0.4
+                        example = synthetic_example(rng, f"P{paper}_{review}_{section}", empty)
+                        f.write(json.dumps(example) + "\n")
+    return base_dir
+
+
+def test_compact_graph_metrics_match_networkx(cell, tmp_path):
+    pytest.importorskip("networkx")
+    names = [name for name in kg.METRICS if kg.METRICS[name].columns]
+    examples = [example for source in SOURCES
+                for _, example in kg.iter_jsonl(kg.source_path(cell, source, "ICLR", "2024", "good"))]
+    for example in examples:
+        compact = kg.example_graph(example)
+        G = kg.example_graph(example, use_networkx=True)
+        assert list(compact.to_networkx().nodes(data=True)) == list(G.nodes(data=True))
+        assert list(compact.to_networkx().edges(data=True)) == list(G.edges(data=True))
+        assert kg.compute_graph_metrics(compact, names) == kg.compute_graph_metrics(G, names)
+
+    # The metrics CSV is byte-identical whichever graph type produced it
+    outputs = []
+    for use_networkx in (False, True):
+        output_path = str(tmp_path / f"metrics_{use_networkx}.csv")
+        graphs = kg.iter_graphs_multi_source(cell, SOURCES, "ICLR", "2024", "good", use_networkx, seed=0)
+        kg.save_metrics_to_csv(graphs, output_path, names)
+        with open(output_path, "rb") as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1]
+
+
+def cell_rows(base_dir, n_shards, manifest=None, cache=None, record=None, names=kg.DEFAULT_METRICS):
+    """Metric rows of the cell computed shard by shard and merged back in order, as run_parallel does"""
+    rows = []
+    for index in range(n_shards):
+        shard = (index, n_shards) if n_shards > 1 else None
+        graphs = kg.iter_ordered_graphs(base_dir, SOURCES, "ICLR", "2024", "good", seed=3, shard=shard,
+                                        manifest=manifest, record=record)
+        rows.extend(kg.iter_metric_rows(graphs, base_dir, SOURCES, "ICLR", "2024", "good", names, cache))
+    return [row for _, row in sorted(rows, key=lambda item: item[0])]
+
+
+def test_sharded_rows_match_unsharded(cell, tmp_path):
+    record = []
+    reference = cell_rows(cell, 1, record=record)
+    assert any(row["source_type"] != "real" and row["section"] == "questions" for row in reference)
+    for n_shards in (2, 4):
+        assert cell_rows(cell, n_shards) == reference
+
+    # Replaying the saved alignment gives the same rows for any shard count
+    path = str(tmp_path / "alignment_seed3.tsv")
+    fingerprint = kg.input_fingerprint(cell, SOURCES, "ICLR", "2024", "good")
+    kg.save_alignment_manifest(path, fingerprint, record)
+    manifest = kg.load_alignment_manifest(path, fingerprint)
+    for n_shards in (1, 4):
+        assert cell_rows(cell, n_shards, manifest=manifest) == reference
+
+    # So does a sharded run that fills and then reads the metric cache
+    cache = kg.MetricCache(str(tmp_path / "metric_cache.sqlite"))
+    for _ in range(2):
+        assert cell_rows(cell, 4, cache=cache) == reference
+    cache.close()
@@ -0,0 +1,91 @@
+import inspect
+import pytest
+
+openreview = pytest.importorskip("openreview")
+from OpenReview_cache import NotesCache
+
+GET_ALL_NOTES = inspect.signature(openreview.api.OpenReviewClient.get_all_notes)
+GET_GROUP = inspect.signature(openreview.api.OpenReviewClient.get_group)
+
+
+class RecordingClient:
+    """Serves canned notes, binding every call to the real client signatures"""
+
+    def __init__(self):
+        self.calls = []
+        self.replies = [{"id": "r1", "content": {"rating": {"value": "6: accept"}}}]
+
+    def get_all_notes(self, **kwargs):
+        GET_ALL_NOTES.bind(None, **kwargs)
+        self.calls.append(kwargs)
+        note = openreview.api.Note(id="p1", forum="p1", content={"title": {"value": "Paper"}}, mdate=len(self.calls))
+        note.details = {"directReplies": list(self.replies)}
+        return [note]
+
+    def get_group(self, group_id):
+        GET_GROUP.bind(None, group_id)
+        self.calls.append(group_id)
+        return openreview.api.Group(id=group_id, content={"submission_id": {"value": "Venue/-/Submission"}})
+
+
+def test_expired_entry_is_refetched_with_new_replies(tmp_path):
+    client = RecordingClient()
+    cache = NotesCache(str(tmp_path / "cache.sqlite"), ttl=0)
+    query = {"invitation": "Venue/-/Submission", "details": "directReplies"}
+
+    first = cache.get_all_notes(client.get_all_notes, **query)
+    assert first[0].details["directReplies"][0]["id"] == "r1"
+
+    client.replies.append({"id": "r2", "content": {}})
+    refreshed = cache.get_all_notes(client.get_all_notes, **query)
+    assert [r["id"] for r in refreshed[0].details["directReplies"]] == ["r1", "r2"]
+    assert client.calls == [query, query]
+    assert cache.refreshes == 1
+
+
+def test_offline_replays_notes_and_group(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    client = RecordingClient()
+    online = NotesCache(path)
+    online.get_group(client.get_group, "Venue")
+    online.get_all_notes(client.get_all_notes, forum="p1")
+    online.close()
+
+    offline = NotesCache(path, offline=True)
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("offline cache hit the network")
+
+    group = offline.get_group(no_network, "Venue")
+    assert group.content["submission_id"]["value"] == "Venue/-/Submission"
+    assert offline.get_all_notes(no_network, forum="p1")[0].id == "p1"
+    with pytest.raises(KeyError):
+        offline.get_all_notes(no_network, forum="p2")
+
+
+class ForumClient:
+    """Replies of one forum, filtered by mintcdate like the API"""
+
+    def __init__(self):
+        self.calls = []
+        self.replies = [("r1", 100, "5"), ("r2", 200, "6")]
+
+    def get_all_notes(self, **kwargs):
+        GET_ALL_NOTES.bind(None, **kwargs)
+        self.calls.append(kwargs)
+        return [
+            openreview.api.Note(id=note_id, forum="p1", cdate=cdate, content={"rating": {"value": rating}})
+            for note_id, cdate, rating in self.replies if cdate >= kwargs.get("mintcdate", 0)
+        ]
+
+
+def test_expired_forum_fetches_only_new_replies(tmp_path):
+    client = ForumClient()
+    cache = NotesCache(str(tmp_path / "cache.sqlite"), ttl=0)
+    assert [n.id for n in cache.get_all_notes(client.get_all_notes, forum="p1")] == ["r1", "r2"]
+
+    client.replies.append(("r3", 300, "8"))
+    notes = cache.get_all_notes(client.get_all_notes, forum="p1")
+    assert [n.id for n in notes] == ["r1", "r2", "r3"]
+    assert client.calls == [{"forum": "p1"}, {"forum": "p1", "mintcdate": 200}]
+    assert cache.refreshes == 1
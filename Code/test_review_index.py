@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+from Review_index import ReviewIndex
+
+
+def test_filtered_ivf_query_finds_rare_source(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((5000, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    # 20 "real" rows among thousands of "gpt" rows, so the probed lists rarely hold enough of them
+    keys = [("good", f"p{row}", "real" if row % 250 == 0 else "gpt", 0, "summary") for row in range(len(vectors))]
+    index = ReviewIndex(keys, vectors.astype(np.float16), method="ivf").build()
+
+    hits = index.query(vectors[1], k=10, sources=["real"])
+    assert len(hits) == 10
+    assert all(key[2] == "real" for key, _ in hits)
+
+    # Asking for more matches than exist returns all of them after a full scan
+    assert len(index.query(vectors[1], k=50, sources=["real"])) == 20
+
+    index.save(str(tmp_path))
+    reloaded = ReviewIndex.load(str(tmp_path))
+    assert [key for key, _ in reloaded.query(vectors[1], k=10, sources=["real"])] == [key for key, _ in hits]
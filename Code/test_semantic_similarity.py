@@ -0,0 +1,64 @@
+import os
+import json
+import numpy as np
+import Semantic_similarity
+from Semantic_similarity import category_paths, plan_jobs
+from Embedding_store import EmbeddingStore, SECTION_SOURCE
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def make_tree(root, monkeypatch):
+    """Two papers with real and gpt reviews whose similarity results all exist already"""
+    monkeypatch.setattr(Semantic_similarity, "ROOT_DIR", root)
+    monkeypatch.setattr(Semantic_similarity, "conferences_years", {"ICLR": ["2024"]})
+    monkeypatch.setattr(Semantic_similarity, "categories", ["good"])
+    monkeypatch.setattr(Semantic_similarity, "llm_models", ["gpt"])
+    paths = category_paths("ICLR", "2024", "good")
+    reviews = [{"summary": "A summary."}]
+    write_json(paths["real_review_file"], [{"paper_id": pid, "reviews": reviews} for pid in ("p1", "p2")])
+    for pid in ("p1", "p2"):
+        write_json(os.path.join(paths["section_map_dir"], f"{pid}_section.json"), {"method": "Text."})
+        write_json(os.path.join(paths["llm_review_dirs"]["gpt"], f"{pid}.json"), {"reviews": reviews})
+        write_json(os.path.join(paths["real_output_dir"], f"{pid}.json"), {"paper_id": pid, "reviews": [{}]})
+        write_json(os.path.join(paths["llm_output_dirs"]["gpt"], f"{pid}.json"), {"paper_id": pid, "reviews": [{}]})
+    return paths
+
+
+def test_backfill_plans_sources_missing_from_store(tmp_path, monkeypatch):
+    paths = make_tree(str(tmp_path), monkeypatch)
+    assert plan_jobs() == []
+
+    # p1 is fully stored, p2 only has its real review vectors
+    store = EmbeddingStore(paths["store_dir"], dim=4)
+    keys = [("p1", SECTION_SOURCE, -1, "method"), ("p1", "real", 0, "summary"), ("p1", "gpt", 0, "summary"),
+            ("p2", SECTION_SOURCE, -1, "method"), ("p2", "real", 0, "summary")]
+    store.append(keys, np.ones((len(keys), 4)) / 2)
+
+    plan = plan_jobs(backfill=True)
+    assert len(plan) == 1
+    assert plan[0]["jobs"] == {"p2": ["gpt"]}
+    assert list(plan[0]["paper_files"]) == ["p2"]
+
+
+def test_chunked_mode_does_not_reuse_whole_section_results(tmp_path, monkeypatch):
+    make_tree(str(tmp_path), monkeypatch)
+    assert plan_jobs() == []
+
+    monkeypatch.setattr(Semantic_similarity, "CHUNK_TOKENS", 512)
+    plan = plan_jobs()
+    assert plan[0]["jobs"] == {"p1": ["real", "gpt"], "p2": ["real", "gpt"]}
+    assert "similarity_results_chunk512-32_mean" in plan[0]["paths"]["real_output_dir"]
+
+
+def test_backend_has_its_own_results(tmp_path, monkeypatch):
+    make_tree(str(tmp_path), monkeypatch)
+    monkeypatch.setattr(Semantic_similarity, "backend", "int8")
+    plan = plan_jobs()
+    assert plan[0]["jobs"] == {"p1": ["real", "gpt"], "p2": ["real", "gpt"]}
+    assert "similarity_results_int8" in plan[0]["paths"]["real_output_dir"]
+    assert "embedding_store_int8" in plan[0]["paths"]["store_dir"]